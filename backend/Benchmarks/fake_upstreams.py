@@ -0,0 +1,310 @@
+"""
+Local stand-ins for NASA POWER, Data Rods and the current-weather Node service.
+
+    python -m Benchmarks.fake_upstreams --port 8090 --latency-ms 80 --failure-rate 0.02
+    python -m Benchmarks.fake_upstreams record
+
+Responses replay payloads recorded from the real services (see `record`),
+tiled over whatever range is requested; without recordings they fall back
+to synthetic observations. Each upstream gets its own latency, jitter and
+failure rate, so slow or flaky providers can be reproduced on demand.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from Benchmarks.fixtures import POWER_PARAMETERS, synthetic_observations
+
+RECORDINGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'recordings')
+UPSTREAMS = ('power', 'datarods', 'current_weather')
+
+POWER_FILL_VALUE = -999
+
+# Paths the fakes serve, mirroring the real services
+POWER_PATH = '/api/temporal/hourly/point'
+DATA_RODS_PATH = '/daac-bin/access/timeseries.cgi'
+CURRENT_WEATHER_PATH = '/api/current-weather'
+
+
+def utc_now() -> datetime:
+    """Current UTC time, naive like the timestamps the services exchange."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class UpstreamProfile:
+    """Latency and failure behaviour of one fake upstream."""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, failure_rate: float = 0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+
+    def to_dict(self) -> Dict:
+        return {'latency_ms': self.latency_ms, 'jitter_ms': self.jitter_ms, 'failure_rate': self.failure_rate}
+
+
+class Recordings:
+    """Recorded payloads, replayed cyclically over any requested range."""
+
+    def __init__(self, directory: str = RECORDINGS_DIR):
+        self.power = self._load_power(os.path.join(directory, 'power.json'))
+        self.datarods = self._load_datarods(os.path.join(directory, 'datarods.txt'))
+        self.current_weather = self._load_json(os.path.join(directory, 'current_weather.json'))
+
+    @staticmethod
+    def _load_json(path: str) -> Optional[Dict]:
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def _load_power(self, path: str) -> Optional[pd.DataFrame]:
+        data = self._load_json(path)
+        if data is None:
+            return None
+        return pd.DataFrame(data['properties']['parameter'])
+
+    @staticmethod
+    def _load_datarods(path: str) -> Optional[np.ndarray]:
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            values = [float(line.split()[1]) for line in f
+                      if line.strip() and not line.startswith('#') and len(line.split()) >= 2]
+        return np.array(values) if values else None
+
+    def observations(self, start: datetime, hours: int) -> pd.DataFrame:
+        index = pd.date_range(start, periods=hours, freq='h')
+        if self.power is None:
+            # Seed by start date so a range always gets the same values
+            return synthetic_observations(start, hours, seed=int(start.strftime('%Y%m%d')))
+        rows = np.arange(hours) % len(self.power)
+        frame = pd.DataFrame({
+            column: self.power[column].to_numpy()[rows]
+            for column in POWER_PARAMETERS if column in self.power
+        }, index=index)
+        return frame
+
+    def precipitation(self, start: datetime, hours: int) -> np.ndarray:
+        if self.datarods is None:
+            return self.observations(start, hours)['PRECTOTCORR'].to_numpy()
+        return self.datarods[np.arange(hours) % len(self.datarods)]
+
+
+def create_app(profiles: Dict[str, UpstreamProfile], recordings: Optional[Recordings] = None,
+               seed: int = 0) -> FastAPI:
+    """
+    FastAPI app serving all three fake upstreams.
+
+    Args:
+        profiles: UpstreamProfile per upstream name ('power', 'datarods', 'current_weather')
+        recordings: Payloads to replay (synthetic data if None)
+        seed: Seed for latency jitter and injected failures
+    """
+    app = FastAPI()
+    recordings = recordings or Recordings()
+    rng = random.Random(seed)
+    counts = {name: {'requests': 0, 'failures': 0} for name in UPSTREAMS}
+
+    async def behave(name: str) -> bool:
+        """Sleep for the configured latency; returns False when this request should fail."""
+        profile = profiles.get(name, UpstreamProfile())
+        counts[name]['requests'] += 1
+        delay = profile.latency_ms + rng.uniform(-profile.jitter_ms, profile.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if rng.random() < profile.failure_rate:
+            counts[name]['failures'] += 1
+            return False
+        return True
+
+    @app.get(POWER_PATH)
+    async def power(request: Request):
+        if not await behave('power'):
+            return JSONResponse({'messages': ['Injected failure']}, status_code=503)
+        params = request.query_params
+        start = datetime.strptime(params['start'], '%Y%m%d')
+        end = datetime.strptime(params['end'], '%Y%m%d')
+        hours = int((end - start).total_seconds() // 3600) + 24
+        frame = recordings.observations(start, hours)
+        # Like POWER, pad hours that have not been observed yet with the fill value
+        frame.loc[frame.index > utc_now().replace(minute=0, second=0, microsecond=0)] = POWER_FILL_VALUE
+        requested = [p for p in params.get('parameters', ','.join(POWER_PARAMETERS)).split(',') if p in frame]
+        keys = frame.index.strftime('%Y%m%d%H')
+        return {
+            'type': 'Feature',
+            'properties': {'parameter': {
+                param: dict(zip(keys, np.round(frame[param].to_numpy(), 4).tolist()))
+                for param in requested
+            }}
+        }
+
+    @app.get(DATA_RODS_PATH)
+    async def datarods(request: Request):
+        if not await behave('datarods'):
+            return PlainTextResponse('ERROR: Injected failure', status_code=503)
+        params = request.query_params
+        start = datetime.fromisoformat(params['startDate'].replace('Z', ''))
+        end = datetime.fromisoformat(params['endDate'].replace('Z', ''))
+        hours = int((end - start).total_seconds() // 3600) + 1
+        values = recordings.precipitation(start, hours)
+        lines = [f"# variable {params.get('variable', '')}", f"# location {params.get('location', '')}"]
+        lines += [
+            f"{(start + timedelta(hours=i)).strftime('%Y-%m-%dT%H:%M:%SZ')} {value:.4f}"
+            for i, value in enumerate(values)
+        ]
+        return PlainTextResponse('\n'.join(lines))
+
+    @app.post(CURRENT_WEATHER_PATH)
+    async def current_weather(request: Request):
+        if not await behave('current_weather'):
+            return JSONResponse({'error': 'Injected failure'}, status_code=503)
+        if recordings.current_weather is not None:
+            return recordings.current_weather
+        now = synthetic_observations(utc_now(), 1).iloc[0]
+        return {
+            'temperature': round(float(now['T2M']), 1),
+            'humidity': round(float(now['RH2M']), 1),
+            'wind_speed': round(float(now['WS10M']), 1),
+            'precipitation': 0
+        }
+
+    @app.get('/_stats')
+    def stats():
+        return counts
+
+    return app
+
+
+class FakeUpstreams:
+    """
+    Run the fake upstreams on a background thread.
+
+        with FakeUpstreams(port=8090, profiles=...) as fakes:
+            env = fakes.env()  # POWER_API_URL, DATA_RODS_URL, CURRENT_WEATHER_URL
+    """
+
+    def __init__(self, port: int = 8090, profiles: Optional[Dict[str, UpstreamProfile]] = None,
+                 recordings_dir: str = RECORDINGS_DIR, seed: int = 0):
+        self.port = port
+        self.app = create_app(profiles or {}, Recordings(recordings_dir), seed)
+        self._server = uvicorn.Server(uvicorn.Config(self.app, host='127.0.0.1', port=port, log_level='warning'))
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f'http://127.0.0.1:{self.port}'
+
+    def env(self) -> Dict[str, str]:
+        """Environment that points the backend at these fakes."""
+        return {
+            'POWER_API_URL': self.base_url + POWER_PATH,
+            'DATA_RODS_URL': self.base_url + DATA_RODS_PATH,
+            'CURRENT_WEATHER_URL': self.base_url + CURRENT_WEATHER_PATH,
+        }
+
+    def start(self, timeout: float = 10):
+        self._thread = threading.Thread(target=self._server.run, name='fake-upstreams', daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise Exception(f"Fake upstreams did not start on port {self.port}")
+            time.sleep(0.05)
+
+    def stop(self):
+        self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(5)
+
+    def __enter__(self) -> 'FakeUpstreams':
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def record(latitude: float = 43.4643, longitude: float = -80.5204, days: int = 14,
+           directory: str = RECORDINGS_DIR):
+    """Save one real response per upstream for the fakes to replay."""
+    import requests
+    from Data_Collector.data_fetcher import POWER_API_URL
+    from Data_Collector.data_rod_fetcher import DATA_RODS_URL
+
+    os.makedirs(directory, exist_ok=True)
+    # POWER lags real time by a few days
+    end = utc_now() - timedelta(days=7)
+    start = end - timedelta(days=days - 1)
+
+    response = requests.get(POWER_API_URL, params={
+        'parameters': ','.join(POWER_PARAMETERS), 'community': 'RE',
+        'longitude': longitude, 'latitude': latitude,
+        'start': start.strftime('%Y%m%d'), 'end': end.strftime('%Y%m%d'), 'format': 'JSON'
+    }, timeout=120)
+    response.raise_for_status()
+    with open(os.path.join(directory, 'power.json'), 'w') as f:
+        json.dump(response.json(), f)
+    print(f"✓ Recorded POWER ({days} days)")
+
+    response = requests.get(DATA_RODS_URL, params={
+        'type': 'asc2', 'location': f'GEOM:POINT({longitude}, {latitude})',
+        'variable': 'NLDAS_FORA0125_H.002:APCPsfc',
+        'startDate': start.strftime('%Y-%m-%dT00:00:00Z'), 'endDate': end.strftime('%Y-%m-%dT23:00:00Z')
+    }, timeout=120)
+    if response.status_code == 200 and 'ERROR' not in response.text:
+        with open(os.path.join(directory, 'datarods.txt'), 'w') as f:
+            f.write(response.text)
+        print("✓ Recorded Data Rods")
+    else:
+        print(f"⚠ Data Rods returned {response.status_code}, not recorded")
+
+    try:
+        response = requests.post(os.environ.get('CURRENT_WEATHER_URL', 'http://localhost:3001/api/current-weather'),
+                                 json={'latitude': latitude, 'longitude': longitude}, timeout=10)
+        response.raise_for_status()
+        with open(os.path.join(directory, 'current_weather.json'), 'w') as f:
+            json.dump(response.json(), f)
+        print("✓ Recorded current weather")
+    except Exception as e:
+        print(f"⚠ Current-weather service not recorded: {e}")
+
+
+def profiles_from_args(args) -> Dict[str, UpstreamProfile]:
+    profile = UpstreamProfile(args.latency_ms, args.jitter_ms, args.failure_rate)
+    return {name: profile for name in UPSTREAMS}
+
+
+def add_profile_args(parser: argparse.ArgumentParser):
+    parser.add_argument('--latency-ms', type=float, default=50.0, help='Added latency per upstream request')
+    parser.add_argument('--jitter-ms', type=float, default=10.0, help='Uniform +/- jitter on the latency')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of upstream requests that fail')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fake NASA POWER / Data Rods / current-weather servers')
+    parser.add_argument('command', nargs='?', choices=['serve', 'record'], default='serve')
+    parser.add_argument('--port', type=int, default=8090)
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        record()
+    else:
+        app = create_app(profiles_from_args(args))
+        uvicorn.run(app, host='127.0.0.1', port=args.port, log_level='warning')
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+from Prediction_Modeller.prec_modeler import TARGET, PrecipitationModel, engineered_names
+from Prediction_Modeller import numpy_lstm
+
+POWER_PARAMETERS = ['PRECTOTCORR', 'T2M', 'RH2M', 'PS', 'WS10M']
+
+# Layer sizes of the production model (see PrecipitationModel.train)
+LSTM_UNITS = (128, 64)
+DENSE_UNITS = 32
+DROPOUT_RATE = 0.2
+
+
+def synthetic_observations(start, hours: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Plausible hourly POWER observations with daily and seasonal cycles.
+
+    Args:
+        start: First timestamp
+        hours: Number of hourly rows
+        seed: Noise seed, so repeated runs see the same data
+
+    Returns:
+        DataFrame with the POWER_PARAMETERS columns and an hourly DatetimeIndex
+    """
+    index = pd.date_range(pd.Timestamp(start).floor('h'), periods=hours, freq='h')
+    rng = np.random.default_rng(seed)
+    day = 2 * np.pi * index.hour / 24
+    season = 2 * np.pi * index.dayofyear / 365
+    showers = rng.random(hours) < 0.08
+    return pd.DataFrame({
+        'PRECTOTCORR': np.where(showers, rng.gamma(0.6, 1.5, hours), 0.0),
+        'T2M': 8 - 12 * np.cos(season) + 4 * np.sin(day - np.pi / 2) + rng.normal(0, 1, hours),
+        'RH2M': 70 + 15 * np.cos(day) + rng.normal(0, 4, hours),
+        'PS': 100 + 0.8 * np.sin(season) + rng.normal(0, 0.2, hours),
+        'WS10M': np.abs(3 + rng.normal(0, 1.2, hours)),
+    }, index=index)
+
+
+def _lstm_layer(rng, n_in: int, units: int, return_sequences: bool):
+    scale = 1 / np.sqrt(units)
+    return {
+        'type': 'lstm',
+        'kernel': rng.uniform(-scale, scale, (n_in, 4 * units)).astype(np.float32),
+        'recurrent': rng.uniform(-scale, scale, (units, 4 * units)).astype(np.float32),
+        'bias': np.zeros(4 * units, dtype=np.float32),
+        'activation': 'tanh',
+        'recurrent_activation': 'sigmoid',
+        'return_sequences': return_sequences,
+    }
+
+
+def _dense_layer(rng, n_in: int, units: int, activation: str):
+    scale = 1 / np.sqrt(n_in)
+    return {
+        'type': 'dense',
+        'kernel': rng.uniform(-scale, scale, (n_in, units)).astype(np.float32),
+        'bias': np.zeros(units, dtype=np.float32),
+        'activation': activation,
+    }
+
+
+def write_synthetic_model(filepath: str, sequence_length: int = 24, seed: int = 0) -> str:
+    """
+    Export an untrained model with the production architecture for the NumPy backend.
+
+    Forward passes cost the same as the real model's, so benchmarks do not
+    need trained weights or TensorFlow.
+
+    Args:
+        filepath: Model .pkl path the server loads; the weights go to <name>_weights.npz
+
+    Returns:
+        Path of the written .npz
+    """
+    model = PrecipitationModel()
+    observations = synthetic_observations('2024-01-01', 24 * 60, seed)
+    features = model.engineer_features(observations).drop(columns=TARGET)
+    feature_names = [name for name in engineered_names(POWER_PARAMETERS) if name != TARGET]
+    features = features[feature_names]
+
+    rng = np.random.default_rng(seed)
+    layers = [
+        _lstm_layer(rng, len(feature_names), LSTM_UNITS[0], True),
+        {'type': 'dropout', 'rate': DROPOUT_RATE},
+        _lstm_layer(rng, LSTM_UNITS[0], LSTM_UNITS[1], False),
+        {'type': 'dropout', 'rate': DROPOUT_RATE},
+        _dense_layer(rng, LSTM_UNITS[1], DENSE_UNITS, 'relu'),
+        _dense_layer(rng, DENSE_UNITS, 1, 'linear'),
+    ]
+    weights_path = filepath.replace('.pkl', '_weights.npz')
+    numpy_lstm.save_weights(weights_path, layers, features.mean().to_numpy(), features.std(ddof=0).to_numpy(),
+                            feature_names, sequence_length)
+    return weights_path
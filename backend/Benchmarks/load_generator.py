@@ -0,0 +1,126 @@
+"""
+Closed-loop HTTP load generator for the API.
+
+    python -m Benchmarks.load_generator --url http://localhost:8000 --endpoint /predict --concurrency 16 --requests 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import numpy as np
+
+# Dashboard-like mix: a few cities near the bundled climatology, the rest anywhere
+CITIES = [
+    (43.4643, -80.5204), (43.6532, -79.3832), (45.5017, -73.5673), (49.2827, -123.1207),
+    (51.0447, -114.0719), (53.5461, -113.4938), (44.6488, -63.5752), (46.8139, -71.2080),
+    (40.7128, -74.0060), (41.8781, -87.6298), (47.6062, -122.3321), (34.0522, -118.2437),
+]
+
+
+def predict_payload(rng: random.Random) -> Dict:
+    latitude, longitude = rng.choice(CITIES)
+    start = datetime.now(timezone.utc).replace(tzinfo=None, minute=0, second=0, microsecond=0) + timedelta(hours=rng.randint(1, 48))
+    return {
+        'latitude': latitude,
+        'longitude': longitude,
+        'target_time': start.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'end_time': (start + timedelta(hours=rng.choice([6, 24, 72]))).strftime('%Y-%m-%dT%H:%M:%SZ'),
+    }
+
+
+def baseline_payload(rng: random.Random) -> Dict:
+    latitude, longitude = rng.choice(CITIES)
+    start = datetime(2025, 10, 1) + timedelta(days=rng.randint(0, 20))
+    return {
+        'latitude': latitude,
+        'longitude': longitude,
+        'target_time': start.strftime('%Y-%m-%dT00:00:00Z'),
+        'end_time': (start + timedelta(days=7)).strftime('%Y-%m-%dT00:00:00Z'),
+    }
+
+
+PAYLOADS: Dict[str, Callable[[random.Random], Dict]] = {
+    '/predict': predict_payload,
+    '/historical-baseline': baseline_payload,
+}
+
+
+def summarize(latencies_ms: List[float], errors: int, elapsed: float) -> Dict:
+    latencies = np.array(latencies_ms) if latencies_ms else np.array([np.nan])
+    total = len(latencies_ms) + errors
+    return {
+        'requests': total,
+        'errors': errors,
+        'error_rate': errors / total if total else 0.0,
+        'elapsed_seconds': elapsed,
+        'rps': len(latencies_ms) / elapsed if elapsed else 0.0,
+        'mean_ms': float(np.mean(latencies)),
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'max_ms': float(np.max(latencies)),
+    }
+
+
+async def run_load(base_url: str, endpoint: str, concurrency: int = 16, requests: int = 200,
+                   timeout: float = 120, seed: int = 0) -> Dict:
+    """
+    Send `requests` POSTs to one endpoint from `concurrency` concurrent clients.
+
+    Each client sends its next request as soon as the previous one returns.
+    Non-2xx responses and transport errors count as errors and are left out
+    of the latency percentiles.
+
+    Returns:
+        {"requests", "errors", "error_rate", "rps", "mean_ms", "p50_ms", "p95_ms", "p99_ms", ...}
+    """
+    make_payload = PAYLOADS[endpoint]
+    rng = random.Random(seed)
+    payloads = [make_payload(rng) for _ in range(requests)]
+    latencies: List[float] = []
+    errors = 0
+    next_request = 0
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        async def worker():
+            nonlocal errors, next_request
+            while next_request < len(payloads):
+                payload = payloads[next_request]
+                next_request += 1
+                started = time.perf_counter()
+                try:
+                    response = await client.post(endpoint, json=payload)
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append((time.perf_counter() - started) * 1000)
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return summarize(latencies, errors, elapsed)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load-test one API endpoint')
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--endpoint', choices=sorted(PAYLOADS), default='/predict')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+    result = asyncio.run(run_load(args.url, args.endpoint, args.concurrency, args.requests))
+    print(json.dumps(result, indent=2))
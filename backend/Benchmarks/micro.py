@@ -0,0 +1,109 @@
+"""
+Micro-benchmarks for the CPU-bound stages behind /predict and /historical-baseline.
+
+    python -m Benchmarks.micro
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from Benchmarks.fixtures import synthetic_observations, write_synthetic_model
+from Data_Collector.climatology import (
+    ClimatologyIndex, ClimatologyStore, baseline_frame, hourly_grid, window_mean
+)
+from Data_Collector.giovanni_fetcher import load_giovanni_csv
+from Prediction_Modeller.prec_modeler import PrecipitationModel
+
+GIOVANNI_CSV = os.path.join('historical_data', 'waterloo_prec_data.csv')
+MIN_RUN_SECONDS = 0.5  # Keep repeating each benchmark for at least this long
+
+
+def timeit(fn: Callable, min_runs: int = 3, max_runs: int = 200,
+           min_seconds: float = MIN_RUN_SECONDS) -> Dict:
+    """
+    Time repeated calls of fn after one warm-up call, with its console output discarded.
+
+    Returns:
+        {"runs", "mean_ms", "p50_ms", "min_ms", "max_ms"}
+    """
+    timings: List[float] = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn()
+        started = time.perf_counter()
+        while len(timings) < min_runs or (time.perf_counter() - started < min_seconds and len(timings) < max_runs):
+            t0 = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - t0) * 1000)
+    timings = np.array(timings)
+    return {
+        'runs': len(timings),
+        'mean_ms': float(timings.mean()),
+        'p50_ms': float(np.median(timings)),
+        'min_ms': float(timings.min()),
+        'max_ms': float(timings.max()),
+    }
+
+
+def run_micro(n_samples: int = 50) -> Dict[str, Dict]:
+    """Run every micro-benchmark; results are keyed by benchmark name."""
+    results = {}
+
+    def bench(name: str, fn: Callable, **kwargs):
+        results[name] = timeit(fn, **kwargs)
+        print(f"   {name:<40} {results[name]['p50_ms']:10.3f} ms (p50 of {results[name]['runs']})")
+
+    model = PrecipitationModel()
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        model_path = os.path.join(tmp, 'benchmark_model.pkl')
+        write_synthetic_model(model_path)
+        model.load(model_path, backend='numpy')
+
+    year = synthetic_observations('2023-01-01', 24 * 365)
+    recent = synthetic_observations('2025-10-01', 72)
+    engineered = model.engineer_features(year)
+    X = engineered[model.feature_names]
+    X_scaled = model.scaler.transform(X)
+    y = engineered['PRECTOTCORR']
+
+    print("Features")
+    bench('engineer_features[1y]', lambda: model.engineer_features(year))
+    bench('engineer_features[72h]', lambda: model.engineer_features(recent))
+    bench('create_sequences[1y]', lambda: model.create_sequences(X_scaled, y))
+    bench('create_sequences[1y]+copy', lambda: np.ascontiguousarray(model.create_sequences(X_scaled, y)[0]))
+
+    print("Model")
+    window = X.iloc[-model.sequence_length:]
+    bench('predict[1 window]', lambda: model.predict(window, n_samples=n_samples))
+    bench('predict_horizon[72h]', lambda: model.predict_horizon(recent, 72, n_samples=n_samples))
+    windows = np.stack([X_scaled[i:i + model.sequence_length] for i in range(40)])
+    bench('mc_samples[40 windows]', lambda: model.mc_samples(windows, n_samples))
+
+    if os.path.exists(GIOVANNI_CSV):
+        print("Climatology")
+        bench('load_giovanni_csv[1 week]', lambda: load_giovanni_csv(GIOVANNI_CSV, '2025-10-05', '2025-10-12'))
+        bench('ClimatologyStore.from_giovanni_csv', lambda: ClimatologyStore.from_giovanni_csv(GIOVANNI_CSV))
+        store = ClimatologyStore.from_giovanni_csv(GIOVANNI_CSV)
+        index = ClimatologyIndex([store])
+        week = hourly_grid('2025-10-05', '2025-10-12')
+        bench('ClimatologyIndex.hourly_mean[1 week]',
+              lambda: index.hourly_mean(store.latitude, store.longitude, week, years_back=5))
+        averages = index.hourly_mean(store.latitude, store.longitude, week, years_back=5)
+        bench('baseline_frame[1 week]', lambda: baseline_frame(week, averages))
+        history = np.where(np.random.default_rng(0).random((5, 72)) < 0.1, np.nan, 0.2)
+        bench('window_mean[5y x 72h]', lambda: window_mean(history))
+    else:
+        print(f"⚠ {GIOVANNI_CSV} not found, skipping climatology benchmarks")
+
+    return results
+
+
+if __name__ == '__main__':
+    run_micro()
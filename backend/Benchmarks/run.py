@@ -0,0 +1,213 @@
+"""
+Benchmark suite: micro-benchmarks plus end-to-end load against fake upstreams.
+
+    python -m Benchmarks.run                          # run everything, save results/<timestamp>.json
+    python -m Benchmarks.run --compare Benchmarks/baseline.json
+    python -m Benchmarks.run --save-baseline          # record the reference run
+
+End-to-end runs start the fake upstreams and a uvicorn server for main:app,
+pointed at the fakes through POWER_API_URL, DATA_RODS_URL and
+CURRENT_WEATHER_URL, with a fresh POWER cache. Without a trained model in
+the backend directory (or with --synthetic-model) the server loads an
+untrained model of the production size for the NumPy backend.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import httpx
+
+from Benchmarks.fake_upstreams import FakeUpstreams, add_profile_args, profiles_from_args
+from Benchmarks.fixtures import write_synthetic_model
+from Benchmarks.load_generator import PAYLOADS, run_load
+from Benchmarks.micro import run_micro
+
+BENCHMARKS_DIR = os.path.join(BACKEND_DIR, 'Benchmarks')
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, 'results')
+BASELINE_PATH = os.path.join(BENCHMARKS_DIR, 'baseline.json')
+MODEL_FILE = 'trained_precipitation_model.pkl'
+REGRESSION_THRESHOLD = 0.10  # Flag metrics more than 10% worse than the baseline
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                                       text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return 'unknown'
+
+
+def _prepare_workdir(workdir: str, synthetic_model: bool) -> str:
+    """Directory the server runs in: model files and a link to the climatology sources."""
+    if not synthetic_model and os.path.exists(os.path.join(BACKEND_DIR, MODEL_FILE)):
+        return BACKEND_DIR
+    write_synthetic_model(os.path.join(workdir, MODEL_FILE))
+    os.symlink(os.path.join(BACKEND_DIR, 'historical_data'), os.path.join(workdir, 'historical_data'))
+    return workdir
+
+
+def _wait_ready(base_url: str, server: subprocess.Popen, timeout: float = 120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise Exception(f"Server exited with status {server.returncode}")
+        try:
+            if httpx.get(base_url + '/health/ready', timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise Exception(f"Server was not ready after {timeout:.0f}s")
+
+
+def run_end_to_end(args, log_path: str) -> Tuple[Dict[str, Dict], Dict]:
+    """
+    Load-test every endpoint, with the server's output written to log_path.
+
+    Returns:
+        tuple: (results per endpoint, request counts per fake upstream)
+    """
+    results = {}
+    with FakeUpstreams(args.upstream_port, profiles_from_args(args)) as fakes, \
+            tempfile.TemporaryDirectory() as workdir:
+        cwd = _prepare_workdir(workdir, args.synthetic_model)
+        env = {
+            **os.environ,
+            **fakes.env(),
+            'PYTHONPATH': BACKEND_DIR,
+            'POWER_CACHE_PATH': os.path.join(workdir, 'power_cache.sqlite'),
+            'PROVIDER_FORMATS_PATH': os.path.join(workdir, 'provider_formats.sqlite'),
+        }
+        if cwd == workdir:
+            env['MODEL_BACKEND'] = 'numpy'
+
+        base_url = f'http://127.0.0.1:{args.port}'
+        with open(log_path, 'w') as log:
+            server = subprocess.Popen(
+                [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1',
+                 '--port', str(args.port), '--log-level', 'warning'],
+                cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT
+            )
+            try:
+                _wait_ready(base_url, server)
+                for endpoint in PAYLOADS:
+                    print(f"   {endpoint}: {args.requests} requests, concurrency {args.concurrency}...")
+                    result = asyncio.run(run_load(base_url, endpoint, args.concurrency, args.requests))
+                    results[endpoint] = result
+                    print(f"   {endpoint:<22} p50 {result['p50_ms']:8.1f} ms  p95 {result['p95_ms']:8.1f} ms  "
+                          f"p99 {result['p99_ms']:8.1f} ms  {result['rps']:7.1f} req/s  "
+                          f"{result['errors']} errors")
+            finally:
+                server.terminate()
+                server.wait(10)
+        upstream_requests = httpx.get(fakes.base_url + '/_stats').json()
+    return results, upstream_requests
+
+
+def _metrics(run: Dict) -> Dict[str, Tuple[float, bool]]:
+    """Flatten a run into {name: (value, higher_is_better)}."""
+    metrics = {}
+    for name, result in run.get('micro', {}).items():
+        metrics[f'micro {name} p50_ms'] = (result['p50_ms'], False)
+    for endpoint, result in run.get('load', {}).items():
+        for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+            metrics[f'load {endpoint} {key}'] = (result[key], False)
+        metrics[f'load {endpoint} rps'] = (result['rps'], True)
+    return metrics
+
+
+def compare(current: Dict, baseline: Dict, threshold: float = REGRESSION_THRESHOLD) -> List[str]:
+    """
+    Print current metrics next to a baseline run.
+
+    Returns:
+        Names of metrics that got worse by more than `threshold` (relative)
+    """
+    current_metrics, baseline_metrics = _metrics(current), _metrics(baseline)
+    regressions = []
+    print(f"\n{'metric':<58} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, (value, higher_is_better) in current_metrics.items():
+        if name not in baseline_metrics:
+            continue
+        reference = baseline_metrics[name][0]
+        change = (value - reference) / reference if reference else 0.0
+        worse = -change if higher_is_better else change
+        flag = ''
+        if worse > threshold:
+            regressions.append(name)
+            flag = '  ⚠ REGRESSION'
+        print(f"{name:<58} {reference:12.3f} {value:12.3f} {change:+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the benchmark suite')
+    parser.add_argument('--skip-micro', action='store_true')
+    parser.add_argument('--skip-load', action='store_true')
+    parser.add_argument('--port', type=int, default=8765, help='Port for the API under test')
+    parser.add_argument('--upstream-port', type=int, default=8766, help='Port for the fake upstreams')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint')
+    parser.add_argument('--synthetic-model', action='store_true',
+                        help='Serve an untrained model even if a trained one exists')
+    parser.add_argument('--compare', metavar='RESULTS_JSON', help='Compare against an earlier run')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument('--save-baseline', action='store_true', help=f'Also write {BASELINE_PATH}')
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    # Relative data paths (historical_data/) resolve against the backend directory
+    os.chdir(BACKEND_DIR)
+    run = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'config': {
+            'concurrency': args.concurrency,
+            'requests': args.requests,
+            'upstream': {'latency_ms': args.latency_ms, 'jitter_ms': args.jitter_ms,
+                         'failure_rate': args.failure_rate},
+        },
+    }
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    results_path = os.path.join(RESULTS_DIR, datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+
+    if not args.skip_micro:
+        print("Micro-benchmarks")
+        run['micro'] = run_micro()
+    if not args.skip_load:
+        print("End-to-end load")
+        run['load'], run['upstream_requests'] = run_end_to_end(args, results_path.replace('.json', '-server.log'))
+
+    with open(results_path, 'w') as f:
+        json.dump(run, f, indent=2)
+    print(f"\n✓ Results saved to {results_path}")
+    if args.save_baseline:
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(run, f, indent=2)
+        print(f"✓ Baseline saved to {BASELINE_PATH}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(run, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n⚠ {len(regressions)} metrics regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
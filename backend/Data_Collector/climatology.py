@@ -0,0 +1,376 @@
+import csv
+import glob
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+from Data_Collector.power_cache import GRID_LAT_STEP, GRID_LON_STEP, POWER_FILL_VALUE, snap_to_grid
+
+PRECIP_COLUMN = 'mean_M2T1NXFLX_5_12_4_PRECTOT'
+FILL_THRESHOLD = 1e14  # Giovanni fill value is 1e15
+SLOTS_PER_YEAR = 366  # Day-of-year slots, always laid out as a leap year
+MAX_DISTANCE_KM = 100  # Farthest local source used for a coordinate (about two MERRA-2 cells)
+EARTH_RADIUS_KM = 6371.0
+# Seconds between checks of the source directory for added, removed or changed files
+INDEX_CHECK_SECONDS = float(os.environ.get('CLIMATOLOGY_CHECK_SECONDS', 30))
+
+logger = logging.getLogger(__name__)
+
+# First slot of each month in a leap year, so Feb 29 has its own slot
+_MONTH_OFFSETS = np.cumsum([0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30])
+
+
+def slot_index(timestamps: pd.DatetimeIndex) -> np.ndarray:
+    """Leap-year day-of-year slot (0-365) for each timestamp."""
+    return _MONTH_OFFSETS[timestamps.month - 1] + timestamps.day - 1
+
+
+def window_mean(history: np.ndarray, empty: float = 0.0) -> np.ndarray:
+    """Mean over the first axis, ignoring missing values (`empty` where nothing is available)."""
+    counts = np.sum(~np.isnan(history), axis=0)
+    totals = np.nansum(history, axis=0)
+    return np.divide(totals, counts, out=np.full(history.shape[1:], empty), where=counts > 0)
+
+
+def hourly_grid(start_date: str, end_date: str) -> pd.DatetimeIndex:
+    """Hourly timestamps from start_date 00:00 through end_date 23:00 (dates as YYYY-MM-DD)."""
+    return pd.date_range(start_date, pd.Timestamp(end_date) + pd.Timedelta(hours=23), freq='h')
+
+
+def baseline_frame(timestamps: pd.DatetimeIndex, averages: np.ndarray) -> pd.DataFrame:
+    """
+    Historical baseline records for a timestamp grid.
+
+    Args:
+        timestamps: Target grid, usually from hourly_grid
+        averages: Average mm/hour aligned with timestamps, NaN where unknown
+
+    Returns:
+        DataFrame with 'timestamp' (ISO string) and 'historical_avg_precipitation_mm',
+        skipping hours without data
+    """
+    available = ~np.isnan(averages)
+    return pd.DataFrame({
+        'timestamp': timestamps[available].strftime('%Y-%m-%dT%H:%M:%S'),
+        'historical_avg_precipitation_mm': averages[available]
+    })
+
+
+class ClimatologyStore:
+    """
+    Preparsed hourly precipitation climatology for one location.
+
+    values[year, slot, hour] holds the observed mm/hour (NaN where missing).
+    mean[slot, hour] and count[slot, hour] are precomputed across all years.
+    """
+
+    def __init__(self, years: np.ndarray, values: np.ndarray,
+                 latitude: float = np.nan, longitude: float = np.nan,
+                 source_mtime: float = 0.0, source_size: int = 0):
+        self.years = years
+        self.values = values
+        self.latitude = latitude
+        self.longitude = longitude
+        self.count = np.sum(~np.isnan(values), axis=0)
+        self.mean = window_mean(values, empty=np.nan)
+        self.source_mtime = source_mtime
+        self.source_size = source_size
+
+    @classmethod
+    def from_series(cls, timestamps: pd.DatetimeIndex, precip: np.ndarray,
+                    latitude: float, longitude: float, source_path: str) -> 'ClimatologyStore':
+        """Lay out an hourly mm/hour series as a (year, slot, hour) array."""
+        years = np.unique(timestamps.year)
+        values = np.full((len(years), SLOTS_PER_YEAR, 24), np.nan)
+        values[np.searchsorted(years, timestamps.year), slot_index(timestamps), timestamps.hour] = precip
+
+        stat = os.stat(source_path)
+        return cls(years, values, latitude, longitude, stat.st_mtime, stat.st_size)
+
+    @classmethod
+    def from_giovanni_csv(cls, csv_path: str) -> 'ClimatologyStore':
+        """Parse a Giovanni MERRA-2 area-averaged time series CSV."""
+        # Location is the center of the data bounding box in the metadata header
+        with open(csv_path, newline='') as f:
+            header = {row[0].strip(): row[1] for row in itertools.islice(csv.reader(f), 8)
+                      if len(row) > 1 and row[0].endswith(':')}
+        box = header.get('Data Bounding Box:') or header.get('User Bounding Box:')
+        lon_min, lat_min, lon_max, lat_max = (float(v) for v in box.split(','))
+
+        # Skip the metadata header lines (first 8 lines)
+        df = pd.read_csv(csv_path, skiprows=8)
+        df.columns = df.columns.str.strip()
+
+        timestamps = pd.DatetimeIndex(pd.to_datetime(df['time']))
+        raw = df[PRECIP_COLUMN].to_numpy(dtype=float)
+        # Convert precipitation from kg/m²/s to mm/hour
+        precip = np.where(raw >= FILL_THRESHOLD, np.nan, raw * 3600)
+
+        return cls.from_series(timestamps, precip, (lat_min + lat_max) / 2, (lon_min + lon_max) / 2, csv_path)
+
+    @classmethod
+    def from_power_json(cls, json_path: str) -> 'ClimatologyStore':
+        """Parse a saved NASA POWER hourly point response containing PRECTOTCORR (mm/hour)."""
+        with open(json_path) as f:
+            data = json.load(f)
+        longitude, latitude = data['geometry']['coordinates'][:2]
+        series = data['properties']['parameter']['PRECTOTCORR']
+
+        timestamps = pd.DatetimeIndex(pd.to_datetime(list(series.keys()), format='%Y%m%d%H'))
+        raw = np.array(list(series.values()), dtype=float)
+        precip = np.where(raw == POWER_FILL_VALUE, np.nan, raw)
+
+        return cls.from_series(timestamps, precip, latitude, longitude, json_path)
+
+    def save(self, path: str):
+        np.savez(path, years=self.years, values=self.values,
+                 location=np.array([self.latitude, self.longitude]),
+                 source=np.array([self.source_mtime, self.source_size]))
+
+    @classmethod
+    def load(cls, path: str) -> Optional['ClimatologyStore']:
+        """Load a saved store, or None if it was written by an older layout."""
+        with np.load(path) as data:
+            if 'location' not in data.files:
+                return None
+            location, source = data['location'], data['source']
+            return cls(data['years'], data['values'], float(location[0]), float(location[1]),
+                       float(source[0]), int(source[1]))
+
+    def is_stale(self, source_path: str) -> bool:
+        stat = os.stat(source_path)
+        return stat.st_mtime != self.source_mtime or stat.st_size != self.source_size
+
+    def hourly_mean(self, timestamps: pd.DatetimeIndex) -> np.ndarray:
+        """Multi-year mean for each timestamp's (day-of-year, hour) slot, NaN where no data."""
+        return self.mean[slot_index(timestamps), timestamps.hour]
+
+
+def store_path_for(source_path: str) -> str:
+    """Binary store kept next to its source file."""
+    return os.path.splitext(source_path)[0] + '.climatology.npz'
+
+
+def ingest_source(source_path: str, store_path: Optional[str] = None) -> ClimatologyStore:
+    """One-time conversion of a Giovanni CSV or POWER JSON file into the binary store."""
+    store_path = store_path or store_path_for(source_path)
+    if source_path.endswith('.json'):
+        store = ClimatologyStore.from_power_json(source_path)
+    else:
+        store = ClimatologyStore.from_giovanni_csv(source_path)
+    store.save(store_path)
+    logger.info("Ingested %s (%d years) into %s", source_path, len(store.years), store_path)
+    return store
+
+
+def ingest_giovanni_csv(csv_path: str, store_path: Optional[str] = None) -> ClimatologyStore:
+    """One-time conversion of a Giovanni CSV into the binary store."""
+    return ingest_source(csv_path, store_path)
+
+
+_stores: Dict[str, ClimatologyStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(source_path: str) -> ClimatologyStore:
+    """
+    Climatology for a Giovanni CSV or POWER JSON file, kept in memory after the first call.
+
+    Loads the binary store from disk, and re-ingests the source if the store
+    is missing or the source changed since it was built.
+    """
+    with _stores_lock:
+        store = _stores.get(source_path)
+        if store is not None and not store.is_stale(source_path):
+            return store
+
+        store_path = store_path_for(source_path)
+        store = None
+        if os.path.exists(store_path):
+            store = ClimatologyStore.load(store_path)
+            if store is not None and store.is_stale(source_path):
+                store = None
+        if store is None:
+            store = ingest_source(source_path, store_path)
+
+        _stores[source_path] = store
+        return store
+
+
+def _distance_km(lat1: float, lon1: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distance from one point to many."""
+    lat1, lon1, lats, lons = map(np.radians, (lat1, lon1, lats, lons))
+    a = np.sin((lats - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lats) * np.sin((lons - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class ClimatologyIndex:
+    """
+    Climatology for many locations, looked up by coordinate.
+
+    All stores are stacked into values[location, year, slot, hour] over the
+    union of their years, and their all-year means into means[location,
+    slot, hour]. Means over a trailing run of years are computed once per
+    (location, years) and kept. Sources are keyed by their MERRA-2 grid cell
+    for direct lookup; coordinates without their own cell fall back to the
+    nearest source within MAX_DISTANCE_KM.
+    """
+
+    def __init__(self, stores: List[ClimatologyStore]):
+        self.latitudes = np.array([store.latitude for store in stores], dtype=float)
+        self.longitudes = np.array([store.longitude for store in stores], dtype=float)
+        self.years = np.unique(np.concatenate([store.years for store in stores])) if stores else np.array([], dtype=int)
+        self.values = np.full((len(stores), len(self.years), SLOTS_PER_YEAR, 24), np.nan)
+        for i, store in enumerate(stores):
+            self.values[i, np.searchsorted(self.years, store.years)] = store.values
+        self.means = np.stack([store.mean for store in stores]) if stores else np.empty((0, SLOTS_PER_YEAR, 24))
+        self._cells = {snap_to_grid(store.latitude, store.longitude): i for i, store in enumerate(stores)}
+        self._year_means: Dict[Tuple[int, int, int], np.ndarray] = {}
+        self._year_means_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.latitudes)
+
+    def freeze(self):
+        """Make the tables read-only so forked workers keep sharing their pages."""
+        for array in (self.latitudes, self.longitudes, self.years, self.values, self.means):
+            array.setflags(write=False)
+
+    def nearest(self, latitude: float, longitude: float,
+                max_distance_km: float = MAX_DISTANCE_KM) -> Optional[int]:
+        """Location index for a coordinate: its own grid cell, else the nearest source in range."""
+        cell = self._cells.get(snap_to_grid(latitude, longitude))
+        if cell is not None or len(self) == 0:
+            return cell
+        distances = _distance_km(latitude, longitude, self.latitudes, self.longitudes)
+        best = int(np.argmin(distances))
+        return best if distances[best] <= max_distance_km else None
+
+    def _corners(self, latitude: float, longitude: float) -> Optional[Tuple[List[int], np.ndarray]]:
+        """The four grid cells around a coordinate and their bilinear weights, if all are indexed."""
+        lat0 = np.floor(latitude / GRID_LAT_STEP) * GRID_LAT_STEP
+        lon0 = np.floor(longitude / GRID_LON_STEP) * GRID_LON_STEP
+        t = (latitude - lat0) / GRID_LAT_STEP
+        u = (longitude - lon0) / GRID_LON_STEP
+        corners = [
+            (lat0, lon0, (1 - t) * (1 - u)),
+            (lat0, lon0 + GRID_LON_STEP, (1 - t) * u),
+            (lat0 + GRID_LAT_STEP, lon0, t * (1 - u)),
+            (lat0 + GRID_LAT_STEP, lon0 + GRID_LON_STEP, t * u),
+        ]
+        indices = [self._cells.get(snap_to_grid(lat, lon)) for lat, lon, _ in corners]
+        if any(i is None for i in indices):
+            return None
+        return indices, np.array([w for _, _, w in corners])
+
+    def _year_mean(self, location: int, first: int, stop: int) -> np.ndarray:
+        """(slot, hour) mean over the years self.years[first:stop], computed on first use."""
+        key = (location, first, stop)
+        mean = self._year_means.get(key)
+        if mean is None:
+            mean = window_mean(self.values[location, first:stop], empty=np.nan)
+            mean.setflags(write=False)
+            with self._year_means_lock:
+                mean = self._year_means.setdefault(key, mean)
+        return mean
+
+    def _location_mean(self, location: int, timestamps: pd.DatetimeIndex,
+                       years_back: Optional[int]) -> np.ndarray:
+        slots, hours = slot_index(timestamps), timestamps.hour
+        if years_back is None:
+            return self.means[location, slots, hours]
+        averages = np.full(len(timestamps), np.nan)
+        for target_year in np.unique(timestamps.year):
+            rows = timestamps.year == target_year
+            # Years are sorted, so the years_back years before the target are one slice
+            first = int(np.searchsorted(self.years, target_year - years_back))
+            stop = int(np.searchsorted(self.years, target_year))
+            if first == stop:
+                # Target is outside the local record, use its most recent years
+                first = int(np.searchsorted(self.years, self.years[-1] - years_back + 1))
+                stop = len(self.years)
+            averages[rows] = self._year_mean(location, first, stop)[slots[rows], hours[rows]]
+        return averages
+
+    def hourly_mean(self, latitude: float, longitude: float, timestamps: pd.DatetimeIndex,
+                    years_back: Optional[int] = None, method: str = 'nearest',
+                    max_distance_km: float = MAX_DISTANCE_KM) -> Optional[np.ndarray]:
+        """
+        Day-of-year x hour baseline for any coordinate.
+
+        Args:
+            latitude, longitude: Target coordinate
+            timestamps: Hours to return a baseline for
+            years_back: Average only the years_back years before each timestamp's year
+                        (all years if None)
+            method: 'nearest', or 'bilinear' to interpolate between the four surrounding
+                    grid cells when all of them are indexed
+            max_distance_km: Farthest source used by the nearest-cell fallback
+
+        Returns:
+            Average mm/hour aligned with timestamps (NaN where no data), or None if
+            no local source covers the coordinate
+        """
+        if method == 'bilinear':
+            corners = self._corners(latitude, longitude)
+            if corners is not None:
+                indices, weights = corners
+                means = np.stack([self._location_mean(i, timestamps, years_back) for i in indices])
+                weights = np.where(np.isnan(means), 0.0, weights[:, None])
+                totals = weights.sum(axis=0)
+                return np.divide(np.nansum(means * weights, axis=0), totals,
+                                 out=np.full(len(timestamps), np.nan), where=totals > 0)
+
+        location = self.nearest(latitude, longitude, max_distance_km)
+        if location is None:
+            return None
+        return self._location_mean(location, timestamps, years_back)
+
+
+_indexes: Dict[str, Tuple[tuple, ClimatologyIndex, float]] = {}
+_indexes_lock = threading.Lock()
+
+
+def _source_signature(directory: str) -> Tuple[List[str], tuple]:
+    sources = sorted(glob.glob(os.path.join(directory, '*.csv')) + glob.glob(os.path.join(directory, '*.json')))
+    stats = [os.stat(path) for path in sources]
+    return sources, tuple((path, stat.st_mtime, stat.st_size) for path, stat in zip(sources, stats))
+
+
+def get_index(directory: str = 'historical_data') -> ClimatologyIndex:
+    """
+    Climatology index over every Giovanni CSV and POWER JSON file in a directory.
+
+    Rebuilt when files are added, removed or changed, which is checked at
+    most every INDEX_CHECK_SECONDS; each file's binary store is reused from
+    disk where it is still current.
+    """
+    cached = _indexes.get(directory)
+    if cached is not None and time.monotonic() - cached[2] < INDEX_CHECK_SECONDS:
+        return cached[1]
+
+    with _indexes_lock:
+        cached = _indexes.get(directory)
+        if cached is not None and time.monotonic() - cached[2] < INDEX_CHECK_SECONDS:
+            return cached[1]
+        sources, signature = _source_signature(directory)
+        if cached is not None and cached[0] == signature:
+            _indexes[directory] = (signature, cached[1], time.monotonic())
+            return cached[1]
+
+        stores = []
+        for path in sources:
+            try:
+                stores.append(get_store(path))
+            except Exception as e:
+                logger.warning("Skipping climatology source %s: %s", path, e)
+
+        index = ClimatologyIndex(stores)
+        _indexes[directory] = (signature, index, time.monotonic())
+        logger.info("Climatology index built from %d locations", len(index))
+        return index
@@ -1,11 +1,25 @@
+import asyncio
+import os
+import logging
 import requests
+import httpx
 import pandas as pd
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
+from Data_Collector.power_cache import PowerCache, get_default_cache
+from Data_Collector.http_client import get_async_client, get_session
+from Data_Collector.provider_health import ProviderUnavailable, get_provider_health
+from Serving.metrics import get_metrics
+
+# Overridable so benchmarks can point at a local fake server
+POWER_API_URL = os.environ.get('POWER_API_URL', 'https://power.larc.nasa.gov/api/temporal/hourly/point')
+POWER_PROVIDER = 'power'
+
+logger = logging.getLogger(__name__)
 
 class DataFetcher:
-    def __init__(self):
-        self.base_url = "https://power.larc.nasa.gov/api/temporal/hourly/point"
+    def __init__(self, cache: Optional[PowerCache] = None, use_cache: bool = True):
+        self.base_url = POWER_API_URL
         self.parameters = [
             'PRECTOTCORR',
             'T2M',
@@ -13,7 +27,12 @@ class DataFetcher:
             'PS',
             'WS10M',
         ]
-        
+        self.timeout = 60
+        if use_cache:
+            self.cache = cache if cache is not None else get_default_cache()
+        else:
+            self.cache = None
+
     def fetch_data(
         self,
         latitude: float,
@@ -22,18 +41,124 @@ class DataFetcher:
         end_date: str
     ) -> Optional[pd.DataFrame]:
         """
-        Fetch weather data from NASA POWER API.
-        
+        Fetch weather data from NASA POWER API, serving cached days from disk.
+
         Args:
             latitude: Latitude coordinate
             longitude: Longitude coordinate
             start_date: Start date in YYYYMMDD format
             end_date: End date in YYYYMMDD format
-            
+
         Returns:
             DataFrame with weather data or None if fetch fails
         """
-        params = {
+        with get_metrics().timer('power_fetch'):
+            plan = self._plan(latitude, longitude, start_date, end_date)
+            if plan is None:
+                return None
+            days, cached, missing = plan
+
+            fetched = {}
+            if missing:
+                with get_metrics().timer('power_request'):
+                    fetched = self._request(latitude, longitude, missing[0], missing[-1])
+                if fetched is None:
+                    self._count('failed')
+                    return None
+            self._count('fetched' if missing else 'cache_hit')
+            return self._assemble(latitude, longitude, days, cached, fetched)
+
+    async def fetch_data_async(
+        self,
+        latitude: float,
+        longitude: float,
+        start_date: str,
+        end_date: str
+    ) -> Optional[pd.DataFrame]:
+        """
+        Non-blocking version of fetch_data using the shared async HTTP pool.
+        The SQLite cache reads and writes run on a worker thread.
+
+        Same arguments and return value as fetch_data.
+        """
+        with get_metrics().timer('power_fetch'):
+            plan = await asyncio.to_thread(self._plan, latitude, longitude, start_date, end_date)
+            if plan is None:
+                return None
+            days, cached, missing = plan
+
+            fetched = {}
+            if missing:
+                with get_metrics().timer('power_request'):
+                    fetched = await self._request_async(latitude, longitude, missing[0], missing[-1])
+                if fetched is None:
+                    self._count('failed')
+                    return None
+            self._count('fetched' if missing else 'cache_hit')
+            return await asyncio.to_thread(self._assemble, latitude, longitude, days, cached, fetched)
+
+    @staticmethod
+    def _count(result: str):
+        get_metrics().count('weather_power_fetches_total', result=result)
+
+    def _plan(
+        self,
+        latitude: float,
+        longitude: float,
+        start_date: str,
+        end_date: str
+    ) -> Optional[Tuple[List[str], Dict, List[str]]]:
+        """Split the requested range into cached days and days still to fetch."""
+        try:
+            days = [d.strftime('%Y%m%d') for d in pd.date_range(
+                datetime.strptime(start_date, '%Y%m%d'), datetime.strptime(end_date, '%Y%m%d')
+            )]
+        except ValueError as e:
+            logger.error("Invalid date range: %s", e)
+            return None
+
+        cached = {}
+        if self.cache is not None:
+            cached = self.cache.get_days(latitude, longitude, self.parameters, days)
+        missing = [d for d in days if d not in cached]
+        if not missing:
+            logger.debug("Cache hit for (%s, %s) from %s to %s", latitude, longitude, start_date, end_date)
+        return days, cached, missing
+
+    def _assemble(
+        self,
+        latitude: float,
+        longitude: float,
+        days: List[str],
+        cached: Dict,
+        fetched: Dict[str, Dict[str, float]]
+    ) -> Optional[pd.DataFrame]:
+        """Store the fresh response and merge it with cached days into one DataFrame."""
+        if fetched and self.cache is not None:
+            self.cache.put_days(latitude, longitude, self.parameters, fetched)
+
+        # Merge cached days with the fresh response, keeping upstream column order
+        param_data = {}
+        for day in days:
+            for param, values in cached.get(day, {}).items():
+                param_data.setdefault(param, {}).update(values)
+        for param, values in fetched.items():
+            param_data.setdefault(param, {}).update(values)
+
+        try:
+            df = pd.DataFrame(param_data)
+
+            # Convert index to datetime
+            df.index = pd.to_datetime(df.index, format='%Y%m%d%H')
+            df = df.sort_index()
+
+            return df
+        except Exception as e:
+            logger.error("Could not process POWER data: %s", e)
+            return None
+
+    def _request_params(self, latitude: float, longitude: float, start_date: str, end_date: str) -> Dict:
+        return {
             'parameters': ','.join(self.parameters),
             'community': 'RE',
             'longitude': longitude,
@@ -42,31 +167,72 @@ class DataFetcher:
             'end': end_date,
             'format': 'JSON'
         }
-        
+
+    def _parse(self, data: Dict) -> Optional[Dict[str, Dict[str, float]]]:
+        """Extract the POWER 'parameter' block ({param: {YYYYMMDDHH: value}})."""
+        if 'properties' not in data or 'parameter' not in data['properties']:
+            logger.error("Invalid POWER response structure")
+            return None
+
+        param_data = data['properties']['parameter']
+        logger.debug("Fetched %d rows with %d parameters", len(next(iter(param_data.values()), {})), len(param_data))
+        return param_data
+
+    def _request(
+        self,
+        latitude: float,
+        longitude: float,
+        start_date: str,
+        end_date: str
+    ) -> Optional[Dict[str, Dict[str, float]]]:
+        """Fetch one date range from POWER over the shared keep-alive session."""
+        params = self._request_params(latitude, longitude, start_date, end_date)
+
         try:
-            print(f"Fetching NASA data for ({latitude}, {longitude}) from {start_date} to {end_date}...")
-            response = requests.get(self.base_url, params=params, timeout=60)
+            logger.debug("Fetching NASA data for (%s, %s) from %s to %s", latitude, longitude, start_date, end_date)
+            response = get_session().get(self.base_url, params=params, timeout=self.timeout)
             response.raise_for_status()
-            
-            data = response.json()
-            
-            if 'properties' not in data or 'parameter' not in data['properties']:
-                print("ERROR: Invalid response structure")
-                return None
-            
-            # Convert to DataFrame
-            param_data = data['properties']['parameter']
-            df = pd.DataFrame(param_data)
-            
-            # Convert index to datetime
-            df.index = pd.to_datetime(df.index, format='%Y%m%d%H')
-            
-            print(f"✓ Fetched {len(df)} rows with {len(df.columns)} parameters")
-            return df
-            
+            return self._parse(response.json())
+
         except requests.exceptions.RequestException as e:
-            print(f"ERROR fetching data: {e}")
+            logger.warning("POWER request failed: %s", e)
             return None
         except Exception as e:
-            print(f"ERROR processing data: {e}")
-            return None
\ No newline at end of file
+            logger.error("Could not process POWER data: %s", e)
+            return None
+
+    async def _request_async(
+        self,
+        latitude: float,
+        longitude: float,
+        start_date: str,
+        end_date: str
+    ) -> Optional[Dict[str, Dict[str, float]]]:
+        """Fetch one date range from POWER over the shared async pool, unless its circuit is open."""
+        params = self._request_params(latitude, longitude, start_date, end_date)
+
+        async def get():
+            response = await get_async_client().get(self.base_url, params=params, timeout=self.timeout)
+            # Only server errors count against the breaker; a 4xx is about this request (e.g. bad coordinates)
+            if response.status_code >= 500:
+                response.raise_for_status()
+            return response
+
+        try:
+            logger.debug("Fetching NASA data for (%s, %s) from %s to %s", latitude, longitude, start_date, end_date)
+            response = await get_provider_health().call(POWER_PROVIDER, get, budget=self.timeout)
+            response.raise_for_status()
+            return self._parse(response.json())
+
+        except ProviderUnavailable as e:
+            logger.debug("Skipping POWER request: %s", e)
+            return None
+        except asyncio.TimeoutError:
+            logger.warning("POWER request took longer than %ss", self.timeout)
+            return None
+        except httpx.HTTPError as e:
+            logger.warning("POWER request failed: %s", e)
+            return None
+        except Exception as e:
+            logger.error("Could not process POWER data: %s", e)
+            return None
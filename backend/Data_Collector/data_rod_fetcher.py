@@ -1,71 +1,224 @@
+import asyncio
+import logging
+import os
+import re
+import numpy as np
 import pandas as pd
-import requests
-from datetime import datetime, timedelta
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+from Data_Collector.http_client import get_async_client
+from Data_Collector.provider_formats import get_default_formats
+from Data_Collector.provider_health import ProviderUnavailable, get_provider_health, hedged
+from Data_Collector.data_fetcher import POWER_API_URL, POWER_PROVIDER
+from Data_Collector.climatology import baseline_frame, hourly_grid, window_mean
+from Data_Collector.historical_fetcher import (
+    HISTORICAL_CONCURRENCY, align_years, year_windows
+)
+from Serving.metrics import get_metrics
 
-def fetch_datarods_year(latitude: float, longitude: float, start_date: str, end_date: str) -> pd.DataFrame:
+DATA_RODS_URL = os.environ.get('DATA_RODS_URL', 'http://hydro1.sci.gsfc.nasa.gov/daac-bin/access/timeseries.cgi')
+DATA_RODS_PROVIDER = 'datarods'
+DATA_RODS_TIMEOUT = 30
+# Seconds before POWER is queried in parallel with a slow Data Rods request; negative disables
+DATA_RODS_HEDGE_SECONDS = float(os.environ.get('DATA_RODS_HEDGE_SECONDS', 10))
+
+# Variable names Data Rods has accepted for NLDAS hourly precipitation, in order of preference
+DATA_RODS_VARIABLES = [
+    'NLDAS_FORA0125_H.002:APCPsfc',
+    'NLDAS_FORA0125_H_2.0:APCPsfc',
+    'NLDAS_FORA0125_H:APCPsfc',
+    'APCPsfc'
+]
+FORMAT_GOOD_TTL_SECONDS = 7 * 24 * 3600  # Trust a working variable for a week
+FORMAT_FAILED_TTL_SECONDS = 24 * 3600  # Skip a variable for a day once another one worked instead
+PROBE_CONCURRENCY = 2  # Variables probed at once; each probe asks for the whole window
+
+# First two fields of a non-comment line: timestamp and value
+_ASCII_ROW = re.compile(r'^[ \t]*([^\s#]\S*)[ \t]+(\S+)', re.MULTILINE)
+
+logger = logging.getLogger(__name__)
+
+
+def parse_datarods_ascii(text: str) -> pd.DataFrame:
     """
-    Try to fetch from NASA Data Rods API.
-    Returns empty DataFrame if it fails.
+    Parse a Data Rods 'asc2' time series.
+    
+    Every non-comment line whose first two whitespace-separated fields are
+    an ISO timestamp and a number becomes a row; other lines are skipped.
+    A missing value written as "nan" is a number here, so its row is kept
+    with a NaN value.
+    
+    Returns:
+        DataFrame with 'timestamp', 'precipitation_mm', 'year', 'month', 'day', 'hour'
+    """
+    fields = _ASCII_ROW.findall(text)
+    if not fields:
+        return pd.DataFrame()
+    stamps, values = zip(*fields)
+    timestamps = pd.to_datetime(
+        pd.Series(stamps, dtype=object).str.replace('Z', '', regex=False), format='ISO8601', errors='coerce'
+    )
+    values = pd.Series(values, dtype=object)
+    precip = pd.to_numeric(values, errors='coerce')
+    # to_numeric turns both "nan" and non-numbers into NaN; only the latter are not values
+    numeric = precip.notna() | values.str.lstrip('+-').str.lower().eq('nan')
+    valid = timestamps.notna() & numeric
+    if not valid.any():
+        return pd.DataFrame()
+    timestamps, precip = timestamps[valid].reset_index(drop=True), precip[valid].reset_index(drop=True)
+    return pd.DataFrame({
+        'timestamp': timestamps,
+        'precipitation_mm': precip.astype(float),
+        'year': timestamps.dt.year,
+        'month': timestamps.dt.month,
+        'day': timestamps.dt.day,
+        'hour': timestamps.dt.hour
+    })
+
+
+async def _request_datarods(latitude: float, longitude: float, start_date: str, end_date: str,
+                            variable: str) -> Tuple[str, Optional[pd.DataFrame], str, bool]:
+    """
+    One Data Rods request.
+    
+    Returns:
+        tuple: (variable, parsed rows or None, why it failed, whether the service answered at all)
+    """
+    params = {
+        'type': 'asc2',
+        'location': f'GEOM:POINT({longitude}, {latitude})',
+        'variable': variable,
+        'startDate': start_date + 'T00:00:00Z',
+        'endDate': end_date + 'T23:00:00Z'
+    }
+    try:
+        response = await get_async_client().get(DATA_RODS_URL, params=params, timeout=DATA_RODS_TIMEOUT)
+    except Exception as e:
+        return variable, None, f"{type(e).__name__}: {e}", False
+    
+    if response.status_code != 200:
+        return variable, None, f"HTTP {response.status_code}", response.status_code < 500
+    if 'ERROR' in response.text or '<html>' in response.text:
+        return variable, None, "error page", True
+    records = parse_datarods_ascii(response.text)
+    if records.empty:
+        return variable, None, "no data rows", True
+    return variable, records, '', True
+
+
+async def _probe_datarods(latitude: float, longitude: float, start_date: str, end_date: str,
+                          variables: List[str]) -> Tuple[Optional[str], Optional[pd.DataFrame], Dict[str, str], bool]:
+    """
+    Request the variables, PROBE_CONCURRENCY at a time, and keep the first good answer.
+    
+    Returns:
+        tuple: (winning variable, its rows, {variable: failure} for the ones that failed first,
+                whether the service answered any request)
+    """
+    limit = asyncio.Semaphore(PROBE_CONCURRENCY)
+    
+    async def probe(variable: str):
+        async with limit:
+            return await _request_datarods(latitude, longitude, start_date, end_date, variable)
+    
+    tasks = [asyncio.ensure_future(probe(variable)) for variable in variables]
+    failures = {}
+    answered = False
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            variable, records, detail, reached = await next_done
+            answered = answered or reached
+            if records is not None:
+                return variable, records, failures, True
+            failures[variable] = detail
+    finally:
+        for task in tasks:
+            task.cancel()
+    return None, None, failures, answered
+
+
+async def _fetch_datarods(latitude: float, longitude: float, start_date: str, end_date: str,
+                          known: Optional[str], skip: Set[str]) -> pd.DataFrame:
     """
-    base_url = "http://hydro1.sci.gsfc.nasa.gov/daac-bin/access/timeseries.cgi"
-    
-    # Try different variable formats
-    variable_formats = [
-        'NLDAS_FORA0125_H.002:APCPsfc',
-        'NLDAS_FORA0125_H_2.0:APCPsfc',
-        'NLDAS_FORA0125_H:APCPsfc',
-        'APCPsfc'
-    ]
-    
-    for var_format in variable_formats:
-        params = {
-            'type': 'asc2',
-            'location': f'GEOM:POINT({longitude}, {latitude})',
-            'variable': var_format,
-            'startDate': start_date + 'T00:00:00Z',
-            'endDate': end_date + 'T23:00:00Z'
-        }
+    Request the known-good variable, or probe the others; empty DataFrame if the service has no data.
+    
+    Raises:
+        ConnectionError: No request got an answer from the service
+    """
+    with get_metrics().timer('datarods_fetch'):
+        failures = {}
+        answered = False
+        if known is not None:
+            _, records, detail, answered = await _request_datarods(latitude, longitude, start_date, end_date, known)
+            if records is not None:
+                await asyncio.to_thread(_remember, [(known, True, FORMAT_GOOD_TTL_SECONDS, '')])
+                return records
+            failures[known] = detail
         
-        try:
-            response = requests.get(base_url, params=params, timeout=30)
-            
-            if response.status_code == 200 and 'ERROR' not in response.text and '<html>' not in response.text:
-                lines = response.text.strip().split('\n')
-                data_lines = [line for line in lines if not line.startswith('#') and line.strip()]
-                
-                if data_lines:
-                    records = []
-                    for line in data_lines:
-                        parts = line.split()
-                        if len(parts) >= 2:
-                            try:
-                                timestamp = datetime.fromisoformat(parts[0].replace('Z', ''))
-                                precip = float(parts[1])
-                                records.append({
-                                    'timestamp': timestamp,
-                                    'precipitation_mm': precip,
-                                    'year': timestamp.year,
-                                    'month': timestamp.month,
-                                    'day': timestamp.day,
-                                    'hour': timestamp.hour
-                                })
-                            except:
-                                continue
-                    
-                    if records:
-                        print(f"  ✓ Data Rods succeeded")
-                        return pd.DataFrame(records)
-        except:
-            continue
+        candidates = [variable for variable in DATA_RODS_VARIABLES if variable not in skip and variable not in failures]
+        winner, records, probe_failures, probe_answered = await _probe_datarods(
+            latitude, longitude, start_date, end_date, candidates
+        )
+        failures.update(probe_failures)
+        answered = answered or probe_answered
     
+    if winner is not None:
+        logger.debug("Data Rods succeeded with %s", winner)
+        # Another variable worked, so these failures are down to the variable itself
+        await asyncio.to_thread(_remember, [(winner, True, FORMAT_GOOD_TTL_SECONDS, '')] + [
+            (variable, False, FORMAT_FAILED_TTL_SECONDS, detail) for variable, detail in failures.items()
+        ])
+        return records
+    
+    # Nothing worked: an outage or a location Data Rods does not cover. That says nothing about the
+    # variables, so nothing is remembered; repeated outages open the Data Rods circuit instead.
+    if not answered:
+        raise ConnectionError('; '.join(f"{variable}: {detail}" for variable, detail in failures.items()))
     return pd.DataFrame()
 
 
-def fetch_nasa_power_year(latitude: float, longitude: float, start_date: str, end_date: str) -> pd.DataFrame:
+def _learned_variables() -> Tuple[Optional[str], Set[str]]:
+    """Known-good variable and the variables to skip, read from the format cache (blocking)."""
+    formats = get_default_formats()
+    return formats.known_good(DATA_RODS_PROVIDER, DATA_RODS_URL), formats.failed(DATA_RODS_PROVIDER, DATA_RODS_URL)
+
+
+def _remember(verdicts: List[Tuple[str, bool, float, str]]):
+    """Store (variable, ok, ttl_seconds, detail) verdicts in the format cache (blocking)."""
+    formats = get_default_formats()
+    for variable, ok, ttl_seconds, detail in verdicts:
+        formats.record(DATA_RODS_PROVIDER, DATA_RODS_URL, variable, ok, ttl_seconds, detail)
+
+
+async def fetch_datarods_year(latitude: float, longitude: float, start_date: str, end_date: str) -> pd.DataFrame:
+    """
+    Try to fetch from NASA Data Rods API.
+    Returns empty DataFrame if it fails.
+    
+    The variable name Data Rods accepts is learned and persisted: a
+    known-good variable is requested alone, otherwise every variable not
+    known to fail is probed concurrently and the first to return data wins.
+    Nothing is requested while the Data Rods circuit is open.
+    """
+    known, skip = await asyncio.to_thread(_learned_variables)
+    if known is None and skip.issuperset(DATA_RODS_VARIABLES):
+        logger.debug("Every Data Rods variable failed recently, skipping")
+        return pd.DataFrame()
+    
+    try:
+        return await get_provider_health().call(
+            DATA_RODS_PROVIDER, lambda: _fetch_datarods(latitude, longitude, start_date, end_date, known, skip)
+        )
+    except (ProviderUnavailable, ConnectionError) as e:
+        logger.info("Data Rods unavailable: %s", e)
+        return pd.DataFrame()
+
+
+async def fetch_nasa_power_year(latitude: float, longitude: float, start_date: str, end_date: str) -> pd.DataFrame:
     """
     Fetch from NASA POWER API as fallback.
     """
-    base_url = "https://power.larc.nasa.gov/api/temporal/hourly/point"
+    base_url = POWER_API_URL
     
     params = {
         'parameters': 'PRECTOTCORR',
@@ -77,103 +230,111 @@ def fetch_nasa_power_year(latitude: float, longitude: float, start_date: str, en
         'format': 'JSON'
     }
     
+    async def get():
+        response = await get_async_client().get(base_url, params=params, timeout=60)
+        # Only server errors count against the breaker; a 4xx is about this request
+        if response.status_code >= 500:
+            response.raise_for_status()
+        return response
+    
     try:
-        response = requests.get(base_url, params=params, timeout=60)
-        
+        response = await get_provider_health().call(POWER_PROVIDER, get, budget=60)
         if response.status_code == 200:
             data = response.json()
-            precip_data = data['properties']['parameter']['PRECTOTCORR']
+            precip_data = pd.Series(data['properties']['parameter']['PRECTOTCORR'], dtype=float)
+            timestamps = pd.Series(pd.to_datetime(precip_data.index, format='%Y%m%d%H'))
             
-            records = []
-            for timestamp_str, precip_value in precip_data.items():
-                dt = datetime.strptime(timestamp_str, '%Y%m%d%H')
-                records.append({
-                    'timestamp': dt,
-                    'precipitation_mm': precip_value if precip_value >= 0 else 0.0,
-                    'year': dt.year,
-                    'month': dt.month,
-                    'day': dt.day,
-                    'hour': dt.hour
-                })
-            
-            return pd.DataFrame(records)
+            return pd.DataFrame({
+                'timestamp': timestamps,
+                'precipitation_mm': np.where(precip_data.to_numpy() >= 0, precip_data.to_numpy(), 0.0),
+                'year': timestamps.dt.year,
+                'month': timestamps.dt.month,
+                'day': timestamps.dt.day,
+                'hour': timestamps.dt.hour
+            })
     except:
         pass
     
     return pd.DataFrame()
 
 
-def fetch_datarods_historical_average(latitude: float, longitude: float,
-                                     start_date: str, end_date: str,
-                                     years_back: int = 5) -> pd.DataFrame:
-    """
-    Fetch historical precipitation: Data Rods primary, NASA POWER fallback.
+def _precip_series(df: pd.DataFrame) -> Optional[pd.Series]:
+    if df.empty:
+        return None
+    return df.set_index('timestamp')['precipitation_mm']
+
+
+async def _fetch_years(fetch, latitude: float, longitude: float,
+                       windows: List[pd.DatetimeIndex]) -> List[Optional[pd.Series]]:
+    """Precipitation for each window from one source, at most HISTORICAL_CONCURRENCY requests at a time."""
+    limit = asyncio.Semaphore(HISTORICAL_CONCURRENCY)
+    
+    async def fetch_year(window: pd.DatetimeIndex):
+        async with limit:
+            return _precip_series(await fetch(
+                latitude, longitude,
+                window[0].strftime('%Y-%m-%d'), window[-1].strftime('%Y-%m-%d')
+            ))
+    
+    return list(await asyncio.gather(*(fetch_year(window) for window in windows)))
+
+
+async def fetch_datarods_window(latitude: float, longitude: float, start_dt: datetime,
+                                hours: int, years_back: int = 5) -> np.ndarray:
     """
+    Fetch the same hourly window from each past year: Data Rods primary, NASA POWER fallback.
     
-    start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-    end_dt = datetime.strptime(end_date, '%Y-%m-%d')
+    Each year's window is requested on its own, concurrently. If Data Rods
+    fails, or has not answered after DATA_RODS_HEDGE_SECONDS, the years are
+    also fetched from POWER and whichever source finishes first with data
+    is used. Years Data Rods returns nothing for are then backfilled from
+    POWER.
     
-    all_historical_data = []
-    use_fallback = False
+    Returns:
+        np.ndarray of shape (years_back, hours), NaN where missing
+    """
+    windows = year_windows(start_dt, hours, years_back)
     
-    for year_offset in range(1, years_back + 1):
-        historical_year = start_dt.year - year_offset
-        hist_start = start_dt.replace(year=historical_year)
-        hist_end = end_dt.replace(year=historical_year)
-        
-        print(f"Fetching historical data for {historical_year}...")
-        
-        hist_start_str = hist_start.strftime('%Y-%m-%d')
-        hist_end_str = hist_end.strftime('%Y-%m-%d')
-        
-        # Try Data Rods first (only if we haven't switched to fallback)
-        if not use_fallback:
-            year_data = fetch_datarods_year(latitude, longitude, hist_start_str, hist_end_str)
-            
-            if year_data.empty:
-                print(f"  Data Rods failed, switching to NASA POWER fallback")
-                use_fallback = True
-            else:
-                all_historical_data.append(year_data)
-                print(f"  Got {len(year_data)} records from Data Rods")
-                continue
-        
-        # Use NASA POWER fallback
-        if use_fallback:
-            year_data = fetch_nasa_power_year(latitude, longitude, hist_start_str, hist_end_str)
-            
-            if not year_data.empty:
-                all_historical_data.append(year_data)
-                print(f"  Got {len(year_data)} records from NASA POWER")
-            else:
-                print(f"  Both APIs failed for {historical_year}")
+    async def from_datarods():
+        logger.debug("Fetching %d historical windows from Data Rods", len(windows))
+        series = await _fetch_years(fetch_datarods_year, latitude, longitude, windows)
+        if all(values is None for values in series):
+            raise LookupError("No Data Rods data")
+        return DATA_RODS_PROVIDER, series
     
-    if not all_historical_data:
-        raise Exception("Failed to fetch historical data from any source")
+    async def from_power():
+        series = await _fetch_years(fetch_nasa_power_year, latitude, longitude, windows)
+        if all(values is None for values in series):
+            raise LookupError("No NASA POWER data")
+        return POWER_PROVIDER, series
     
-    combined_df = pd.concat(all_historical_data, ignore_index=True)
+    hedge_after = DATA_RODS_HEDGE_SECONDS if DATA_RODS_HEDGE_SECONDS >= 0 else None
+    try:
+        source, series = await hedged('historical_precipitation', from_datarods, from_power, hedge_after)
+    except LookupError:
+        return align_years([None] * len(windows), windows)
+    history = align_years(series, windows)
     
-    averages = combined_df.groupby(['month', 'day', 'hour'])['precipitation_mm'].mean().reset_index()
-    averages.rename(columns={'precipitation_mm': 'historical_avg_precipitation_mm'}, inplace=True)
+    missing = [i for i in range(len(windows)) if np.isnan(history[i]).all()]
+    if source == DATA_RODS_PROVIDER and missing:
+        logger.info("Backfilling %d years missing from Data Rods with NASA POWER", len(missing))
+        backfill = await _fetch_years(fetch_nasa_power_year, latitude, longitude, [windows[i] for i in missing])
+        history[missing] = align_years(backfill, [windows[i] for i in missing])
+    return history
+
+
+async def fetch_datarods_historical_average(latitude: float, longitude: float,
+                                           start_date: str, end_date: str,
+                                           years_back: int = 5) -> pd.DataFrame:
+    """
+    Fetch historical precipitation: Data Rods primary, NASA POWER fallback.
+    """
     
-    result_data = []
-    current_dt = start_dt
-    while current_dt <= end_dt:
-        for hour in range(24):
-            timestamp = current_dt.replace(hour=hour, minute=0, second=0)
-            
-            avg_row = averages[
-                (averages['month'] == timestamp.month) &
-                (averages['day'] == timestamp.day) &
-                (averages['hour'] == timestamp.hour)
-            ]
-            
-            if not avg_row.empty:
-                result_data.append({
-                    'timestamp': timestamp.isoformat(),
-                    'historical_avg_precipitation_mm': float(avg_row.iloc[0]['historical_avg_precipitation_mm'])
-                })
-        
-        current_dt += timedelta(days=1)
+    timestamps = hourly_grid(start_date, end_date)
+    history = await fetch_datarods_window(latitude, longitude, timestamps[0], len(timestamps), years_back)
+    result = baseline_frame(timestamps, window_mean(history, empty=np.nan))
+    
+    if result.empty:
+        raise Exception("Failed to fetch historical data from any source")
     
-    return pd.DataFrame(result_data)
\ No newline at end of file
+    return result
@@ -0,0 +1,119 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from Data_Collector.data_fetcher import DataFetcher
+from Data_Collector.power_cache import IMMUTABLE_AFTER_DAYS
+
+DEFAULT_ROOT = 'training_data'
+MAX_PARALLEL_SHARDS = 4
+
+
+def _slug(name: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_')
+
+
+def shard_path(root: str, location: Dict, year: int) -> str:
+    """One shard per location per year: <root>/<location>/<year>.npz"""
+    return os.path.join(root, _slug(location['name']), f'{year}.npz')
+
+
+def save_shard(path: str, df: pd.DataFrame):
+    """Write a shard column by column, atomically."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp.npz'
+    columns = {f'col_{name}': df[name].to_numpy() for name in df.columns}
+    np.savez(tmp_path, index=df.index.values.astype('datetime64[ns]'),
+             columns=np.array(df.columns, dtype=str), **columns)
+    os.replace(tmp_path, path)
+
+
+def shard_is_final(path: str, year: int) -> bool:
+    """A shard is final once it was written after POWER stopped backfilling that year."""
+    final_after = datetime(year + 1, 1, 1) + timedelta(days=IMMUTABLE_AFTER_DAYS)
+    return os.path.exists(path) and os.path.getmtime(path) >= final_after.timestamp()
+
+
+def load_shard(path: str) -> pd.DataFrame:
+    with np.load(path) as data:
+        index = pd.DatetimeIndex(data['index'])
+        return pd.DataFrame({str(name): data[f'col_{name}'] for name in data['columns']}, index=index)
+
+
+def _fetch_shard(fetcher: DataFetcher, root: str, location: Dict, year: int) -> Optional[pd.DataFrame]:
+    df = fetcher.fetch_data(
+        latitude=location['lat'],
+        longitude=location['lon'],
+        start_date=f'{year}0101',
+        end_date=f'{year}1231',
+    )
+    if df is None or len(df) == 0:
+        return None
+    save_shard(shard_path(root, location, year), df)
+    return df
+
+
+def build_dataset(locations: List[Dict], years: List[int], root: str = DEFAULT_ROOT,
+                  max_workers: int = MAX_PARALLEL_SHARDS) -> Dict[str, List[str]]:
+    """
+    Fetch every missing (location, year) shard, at most max_workers at a time.
+
+    Final shards already on disk are skipped, so an interrupted build
+    resumes where it stopped and adding a location only fetches that
+    location. Shards of years that were still in progress are refetched.
+
+    Args:
+        locations: [{"name", "lat", "lon"}, ...]
+        years: Calendar years to fetch
+        root: Shard directory
+
+    Returns:
+        {"cached": [...], "fetched": [...], "failed": [...]} with "<name>/<year>" entries
+    """
+    report = {'cached': [], 'fetched': [], 'failed': []}
+    pending = []
+    for location in locations:
+        for year in years:
+            label = f"{location['name']}/{year}"
+            if shard_is_final(shard_path(root, location, year), year):
+                report['cached'].append(label)
+            else:
+                pending.append((location, year, label))
+
+    print(f"   {len(report['cached'])} shards on disk, fetching {len(pending)}...")
+    # Training data is stored in shards, so skip the request cache
+    fetcher = DataFetcher(use_cache=False)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(_fetch_shard, fetcher, root, location, year): label
+            for location, year, label in pending
+        }
+        for future in as_completed(futures):
+            label = futures[future]
+            try:
+                df = future.result()
+            except Exception as e:
+                print(f"   ✗ {label}: {e}")
+                df = None
+            if df is None:
+                report['failed'].append(label)
+            else:
+                report['fetched'].append(label)
+                print(f"   ✓ {label}: {len(df)} rows")
+    return report
+
+
+def load_location(location: Dict, years: List[int], root: str = DEFAULT_ROOT) -> Optional[pd.DataFrame]:
+    """All available shards for one location, in time order."""
+    frames = [
+        load_shard(shard_path(root, location, year))
+        for year in years
+        if os.path.exists(shard_path(root, location, year))
+    ]
+    if not frames:
+        return None
+    return pd.concat(frames).sort_index()
@@ -1,6 +1,7 @@
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 import os
+from Data_Collector.climatology import baseline_frame, get_index, hourly_grid
 
 def load_giovanni_csv(filepath: str, start_date: str, end_date: str) -> pd.DataFrame:
     """
@@ -42,46 +43,24 @@ def fetch_giovanni_historical_average(latitude: float, longitude: float,
                                       start_date: str, end_date: str,
                                       years_back: int = 5) -> pd.DataFrame:
     """
-    Fetch historical precipitation from Giovanni CSV for Waterloo only.
-    """
-    
-    start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-    end_dt = datetime.strptime(end_date, '%Y-%m-%d')
+    Fetch historical precipitation from the local MERRA-2/POWER climatology index.
     
-    # Load Giovanni CSV
-    waterloo_csv = os.path.join('historical_data', 'waterloo_prec_data.csv')
+    Raises LookupError if no local source covers the coordinate.
+    """
     
-    print("Loading Giovanni CSV for Waterloo...")
-    df = load_giovanni_csv(waterloo_csv, start_date, end_date)
+    # Every Giovanni CSV / POWER JSON in historical_data, rebuilt when files change
+    index = get_index('historical_data')
     
-    if df.empty:
-        raise Exception("No data found in Giovanni CSV")
+    # Format for target year
+    timestamps = hourly_grid(start_date, end_date)
+    averages = index.hourly_mean(latitude, longitude, timestamps, years_back=years_back)
     
-    print(f"  Loaded {len(df)} records from Giovanni CSV")
+    if averages is None:
+        raise LookupError(f"No local climatology near ({latitude}, {longitude})")
     
-    # Calculate averages across all years
-    averages = df.groupby(['month', 'day', 'hour'])['precipitation_mm'].mean().reset_index()
-    averages.rename(columns={'precipitation_mm': 'historical_avg_precipitation_mm'}, inplace=True)
+    result = baseline_frame(timestamps, averages)
     
-    # Format for target year
-    result_data = []
-    current_dt = start_dt
-    while current_dt <= end_dt:
-        for hour in range(24):
-            timestamp = current_dt.replace(hour=hour, minute=0, second=0)
-            
-            avg_row = averages[
-                (averages['month'] == timestamp.month) &
-                (averages['day'] == timestamp.day) &
-                (averages['hour'] == timestamp.hour)
-            ]
-            
-            if not avg_row.empty:
-                result_data.append({
-                    'timestamp': timestamp.isoformat(),
-                    'historical_avg_precipitation_mm': float(avg_row.iloc[0]['historical_avg_precipitation_mm'])
-                })
-        
-        current_dt += timedelta(days=1)
+    if result.empty:
+        raise Exception("No data found in local climatology")
     
-    return pd.DataFrame(result_data)
\ No newline at end of file
+    return result
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import List, Optional
+from Data_Collector.observation_context import ObservationContext
+
+HISTORICAL_CONCURRENCY = 4  # Max upstream requests in flight per historical window
+
+logger = logging.getLogger(__name__)
+
+
+def shift_years(dt: datetime, years: int) -> datetime:
+    """Move a datetime back `years` years, mapping Feb 29 to Feb 28."""
+    try:
+        return dt.replace(year=dt.year - years)
+    except ValueError:
+        return dt.replace(year=dt.year - years, day=28)
+
+
+def year_windows(start_dt: datetime, hours: int, years_back: int) -> List[pd.DatetimeIndex]:
+    """Hourly timestamp grid of the same window in each of the past `years_back` years (most recent first)."""
+    return [
+        pd.date_range(shift_years(start_dt, offset), periods=hours, freq='h')
+        for offset in range(1, years_back + 1)
+    ]
+
+
+def align_years(series: List[Optional[pd.Series]], windows: List[pd.DatetimeIndex]) -> np.ndarray:
+    """
+    Align per-year precipitation series onto their window grids.
+
+    Args:
+        series: Hourly values indexed by timestamp (None for a failed year);
+                a single series may also be shared by every window
+        windows: Timestamp grids from year_windows
+
+    Returns:
+        np.ndarray of shape (years, hours), NaN where data is missing
+    """
+    history = np.full((len(windows), len(windows[0]) if windows else 0), np.nan)
+    for i, (values, window) in enumerate(zip(series, windows)):
+        if values is None or values.empty:
+            continue
+        values = values[~values.index.duplicated()]
+        history[i] = values.reindex(window).to_numpy(dtype=float)
+    return history
+
+
+def require_power_window(context: ObservationContext, start_dt: datetime, hours: int,
+                         years_back: int = 5) -> List[pd.DatetimeIndex]:
+    """Declare the days fetch_power_window will read, so they load with the rest of a request."""
+    windows = year_windows(start_dt, hours, years_back)
+    for window in windows:
+        context.require(window[0], window[-1])
+    return windows
+
+
+async def fetch_power_window(latitude: float, longitude: float, start_dt: datetime,
+                             hours: int, years_back: int = 5,
+                             context: Optional[ObservationContext] = None) -> np.ndarray:
+    """
+    Fetch the same hourly window from each past year of NASA POWER data.
+
+    Years are read from the request's ObservationContext (a new one if not
+    given), which fetches them concurrently through DataFetcher together
+    with anything else the request declared, so repeat windows are served
+    from its cache.
+
+    Returns:
+        np.ndarray of shape (years_back, hours) of PRECTOTCORR, NaN where missing
+    """
+    context = context or ObservationContext(latitude, longitude, max_concurrency=HISTORICAL_CONCURRENCY)
+    windows = require_power_window(context, start_dt, hours, years_back)
+
+    async def fetch_year(window: pd.DatetimeIndex) -> Optional[pd.Series]:
+        df = await context.frame(window[0], window[-1])
+        if df is None or 'PRECTOTCORR' not in df.columns:
+            return None
+        precip = df['PRECTOTCORR']
+        return precip.where(precip != -999)
+
+    series = await asyncio.gather(*(fetch_year(window) for window in windows))
+    history = align_years(list(series), windows)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Got %d hours from %d/%d years", hours, int(np.any(~np.isnan(history), axis=1).sum()), years_back)
+    return history
@@ -0,0 +1,104 @@
+import asyncio
+import os
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+# Pool settings, overridable from the environment
+MAX_CONNECTIONS = int(os.environ.get('HTTP_MAX_CONNECTIONS', 100))
+MAX_CONNECTIONS_PER_HOST = int(os.environ.get('HTTP_MAX_CONNECTIONS_PER_HOST', 10))
+KEEPALIVE_EXPIRY = float(os.environ.get('HTTP_KEEPALIVE_EXPIRY', 30))
+CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', 5))
+
+
+class AsyncHttpClient:
+    """
+    Shared non-blocking HTTP client for all upstream providers.
+
+    Wraps one httpx.AsyncClient (keep-alive connection pool) and caps
+    concurrent requests per host so a slow provider cannot take every
+    connection in the pool.
+    """
+
+    def __init__(self, max_connections: int = MAX_CONNECTIONS,
+                 max_connections_per_host: int = MAX_CONNECTIONS_PER_HOST,
+                 keepalive_expiry: float = KEEPALIVE_EXPIRY,
+                 connect_timeout: float = CONNECT_TIMEOUT):
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.keepalive_expiry = keepalive_expiry
+        self.connect_timeout = connect_timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=self.keepalive_expiry
+                ),
+                follow_redirects=True
+            )
+        return self._client
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.max_connections_per_host)
+        return self._host_limits[host]
+
+    async def request(self, method: str, url: str, timeout: float = 60, **kwargs) -> httpx.Response:
+        """
+        Send a request through the shared pool.
+
+        Args:
+            method: HTTP method
+            url: Target URL
+            timeout: Read/write timeout in seconds (connect uses connect_timeout)
+            **kwargs: Passed to httpx (params, json, headers, ...)
+        """
+        client = self._get_client()
+        timeout_config = httpx.Timeout(timeout, connect=min(timeout, self.connect_timeout))
+        async with self._host_limit(url):
+            return await client.request(method, url, timeout=timeout_config, **kwargs)
+
+    async def get(self, url: str, params: Optional[Dict] = None, timeout: float = 60, **kwargs) -> httpx.Response:
+        return await self.request('GET', url, params=params, timeout=timeout, **kwargs)
+
+    async def post(self, url: str, json: Optional[Dict] = None, timeout: float = 60, **kwargs) -> httpx.Response:
+        return await self.request('POST', url, json=json, timeout=timeout, **kwargs)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._host_limits.clear()
+
+
+_async_client = AsyncHttpClient()
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_async_client() -> AsyncHttpClient:
+    """Process-wide async client used by the API endpoints."""
+    return _async_client
+
+
+def get_session() -> requests.Session:
+    """Process-wide keep-alive requests.Session for synchronous callers (training scripts)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=MAX_CONNECTIONS,
+                                  pool_maxsize=MAX_CONNECTIONS_PER_HOST)
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+        return _session
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from Data_Collector.data_fetcher import DataFetcher
+
+MAX_CONCURRENT_FETCHES = 4  # Spans requested from POWER at once per context
+
+DayLike = Union[str, date, datetime, pd.Timestamp]
+
+logger = logging.getLogger(__name__)
+
+
+def to_day(value: DayLike) -> date:
+    """Calendar day of a 'YYYYMMDD' string, date, datetime or Timestamp."""
+    if isinstance(value, str):
+        return datetime.strptime(value, '%Y%m%d').date()
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def merge_ranges(ranges: List[Tuple[date, date]]) -> List[Tuple[date, date]]:
+    """Union of inclusive day ranges as sorted, non-overlapping spans (adjacent days are joined)."""
+    spans: List[List[date]] = []
+    for start, end in sorted(ranges):
+        if spans and start <= spans[-1][1] + timedelta(days=1):
+            spans[-1][1] = max(spans[-1][1], end)
+        else:
+            spans.append([start, end])
+    return [(start, end) for start, end in spans]
+
+
+class ObservationContext:
+    """
+    NASA POWER observations for one location, fetched once per request.
+
+    Each stage of a request declares the days it needs with require(),
+    ideally before any of them reads. The first frame() call merges every
+    pending range into contiguous spans and fetches each span once,
+    concurrently; frame() then returns .loc slices of the span frames, which
+    share their memory. Treat the slices as read-only.
+
+    Ranges declared after a load are fetched on the next frame() call
+    that needs them, unless an already loaded span covers them.
+    """
+
+    def __init__(self, latitude: float, longitude: float, fetcher: Optional[DataFetcher] = None,
+                 max_concurrency: int = MAX_CONCURRENT_FETCHES):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.fetcher = fetcher or DataFetcher()
+        self.max_concurrency = max_concurrency
+        self.ranges_requested = 0
+        self._pending: List[Tuple[date, date]] = []
+        self._spans: List[Tuple[date, date, Optional[pd.DataFrame]]] = []
+        self._lock = asyncio.Lock()
+
+    def require(self, start: DayLike, end: DayLike):
+        """Declare that a stage will read the days start..end (inclusive)."""
+        start, end = to_day(start), to_day(end)
+        self.ranges_requested += 1
+        if self._covering(start, end) is None:
+            self._pending.append((start, end))
+
+    async def load(self):
+        """Fetch every pending range, one request per merged span."""
+        async with self._lock:
+            # A load that finished while we waited may already cover what was declared meanwhile
+            pending = [r for r in self._pending if self._covering(*r) is None]
+            self._pending = []
+            if not pending:
+                return
+            spans = merge_ranges(pending)
+            logger.debug("Fetching %d spans for (%s, %s)", len(spans), self.latitude, self.longitude)
+            limit = asyncio.Semaphore(self.max_concurrency)
+
+            async def fetch(span: Tuple[date, date]) -> Optional[pd.DataFrame]:
+                async with limit:
+                    return await self.fetcher.fetch_data_async(
+                        self.latitude, self.longitude,
+                        span[0].strftime('%Y%m%d'), span[1].strftime('%Y%m%d')
+                    )
+
+            try:
+                frames = await asyncio.gather(*(fetch(span) for span in spans))
+            except BaseException:
+                # Cancelled: leave the ranges for the next reader to fetch
+                self._pending.extend(pending)
+                raise
+            # Failed spans are kept as None so the request does not retry them
+            self._spans.extend((start, end, frame) for (start, end), frame in zip(spans, frames))
+
+    async def frame(self, start: DayLike, end: DayLike) -> Optional[pd.DataFrame]:
+        """
+        Hourly observations for the days start..end (inclusive).
+
+        Returns:
+            A slice of the fetched span (possibly empty), or None if its fetch failed
+        """
+        start, end = to_day(start), to_day(end)
+        self.require(start, end)
+        await self.load()
+        span = self._covering(start, end)
+        if span is None or span[2] is None:
+            return None
+        first = pd.Timestamp(start)
+        last = pd.Timestamp(end) + pd.Timedelta(hours=23)
+        return span[2].loc[first:last]
+
+    def _covering(self, start: date, end: date) -> Optional[Tuple[date, date, Optional[pd.DataFrame]]]:
+        # Most recent first, so a refetched span wins over an older one
+        for span in reversed(self._spans):
+            if span[0] <= start and end <= span[1]:
+                return span
+        return None
+
+    def stats(self) -> Dict:
+        return {
+            'ranges_requested': self.ranges_requested,
+            'spans_fetched': len(self._spans),
+            'days_fetched': sum((end - start).days + 1 for start, end, _ in self._spans)
+        }
@@ -0,0 +1,193 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+# NASA POWER hourly meteorology comes from the MERRA-2 grid (0.5° lat x 0.625° lon),
+# so every point inside a cell returns the same values.
+GRID_LAT_STEP = 0.5
+GRID_LON_STEP = 0.625
+
+IMMUTABLE_AFTER_DAYS = 7  # Days older than this are final and never expire
+HOURS_PER_DAY = 24
+POWER_FILL_VALUE = -999  # POWER's value for hours it has not published
+RECENT_TTL_SECONDS = 3600  # Recent days may still be backfilled upstream
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+DEFAULT_CACHE_PATH = os.path.join('cache', 'power_cache.sqlite')
+
+
+def _complete(payload: Dict[str, Dict[str, float]], params: List[str]) -> bool:
+    """Whether a day has every parameter for every hour, none of them a fill value."""
+    return all(
+        len(payload.get(param, {})) == HOURS_PER_DAY and POWER_FILL_VALUE not in payload[param].values()
+        for param in params
+    )
+
+
+def snap_to_grid(latitude: float, longitude: float) -> Tuple[float, float]:
+    """Snap a coordinate to the center of its POWER grid cell."""
+    lat_cell = round(latitude / GRID_LAT_STEP) * GRID_LAT_STEP
+    lon_cell = round(longitude / GRID_LON_STEP) * GRID_LON_STEP
+    return lat_cell, lon_cell
+
+
+class PowerCache:
+    """
+    Persistent SQLite cache of NASA POWER hourly responses.
+
+    One row per (grid cell, parameter set, day). Complete days older than
+    IMMUTABLE_AFTER_DAYS never expire; more recent days, and days with a
+    missing or fill-valued hour, expire after RECENT_TTL_SECONDS. The file is kept under max_bytes of payload by
+    evicting the least recently used days.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS power_days (
+                lat_cell REAL NOT NULL,
+                lon_cell REAL NOT NULL,
+                params TEXT NOT NULL,
+                day TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (lat_cell, lon_cell, params, day)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_power_days_access ON power_days (last_access)")
+        self._conn.commit()
+
+    def get_days(self, latitude: float, longitude: float, params: List[str],
+                 days: List[str]) -> Dict[str, Dict]:
+        """
+        Look up cached days.
+
+        Args:
+            latitude, longitude: Requested coordinate (snapped internally)
+            params: POWER parameter names
+            days: Days in YYYYMMDD format
+
+        Returns:
+            {day: {param: {YYYYMMDDHH: value}}} for every fresh cached day
+        """
+        lat_cell, lon_cell = snap_to_grid(latitude, longitude)
+        key = ','.join(sorted(params))
+        now = time.time()
+
+        found = {}
+        with self._lock:
+            for day in days:
+                row = self._conn.execute(
+                    "SELECT payload, expires_at FROM power_days "
+                    "WHERE lat_cell=? AND lon_cell=? AND params=? AND day=?",
+                    (lat_cell, lon_cell, key, day)
+                ).fetchone()
+                if row is None or (row[1] is not None and row[1] < now):
+                    self.misses += 1
+                    continue
+                self.hits += 1
+                found[day] = json.loads(row[0])
+
+            if found:
+                self._conn.executemany(
+                    "UPDATE power_days SET last_access=? "
+                    "WHERE lat_cell=? AND lon_cell=? AND params=? AND day=?",
+                    [(now, lat_cell, lon_cell, key, day) for day in found]
+                )
+                self._conn.commit()
+        return found
+
+    def put_days(self, latitude: float, longitude: float, params: List[str],
+                 param_data: Dict[str, Dict[str, float]]):
+        """
+        Store a POWER 'parameter' block, split into one row per day.
+
+        Args:
+            latitude, longitude: Requested coordinate (snapped internally)
+            params: POWER parameter names
+            param_data: {param: {YYYYMMDDHH: value}} as returned by POWER
+        """
+        lat_cell, lon_cell = snap_to_grid(latitude, longitude)
+        key = ','.join(sorted(params))
+        now = time.time()
+        immutable_before = (datetime.now() - timedelta(days=IMMUTABLE_AFTER_DAYS)).strftime('%Y%m%d')
+
+        by_day = {}
+        for param, values in param_data.items():
+            for timestamp, value in values.items():
+                by_day.setdefault(timestamp[:8], {}).setdefault(param, {})[timestamp] = value
+
+        rows = []
+        for day, payload in by_day.items():
+            blob = json.dumps(payload)
+            final = day < immutable_before and _complete(payload, params)
+            expires_at = None if final else now + RECENT_TTL_SECONDS
+            rows.append((lat_cell, lon_cell, key, day, blob, len(blob), expires_at, now))
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO power_days VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop expired rows, then least recently used rows until under max_bytes."""
+        self._conn.execute(
+            "DELETE FROM power_days WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),)
+        )
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM power_days").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        excess = total - self.max_bytes
+        victims = []
+        for rowid, size in self._conn.execute("SELECT rowid, size FROM power_days ORDER BY last_access"):
+            victims.append((rowid,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM power_days WHERE rowid=?", victims)
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM power_days"
+            ).fetchone()
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0,
+            'entries': entries,
+            'size_bytes': size,
+            'max_bytes': self.max_bytes
+        }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> PowerCache:
+    """Process-wide cache shared by every DataFetcher."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = PowerCache(os.environ.get('POWER_CACHE_PATH', DEFAULT_CACHE_PATH))
+        return _default_cache
@@ -0,0 +1,108 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Set
+
+DEFAULT_FORMATS_PATH = os.path.join('cache', 'provider_formats.sqlite')
+
+
+class ProviderFormatCache:
+    """
+    Persistent record of which request variants a provider accepts.
+
+    One row per (provider, endpoint, variant), e.g. a Data Rods variable
+    name, saying whether the last request with it worked and until when
+    that is worth trusting. Callers go straight to a known-good variant and
+    skip variants that failed recently; expired rows are ignored, so a
+    variant is probed again once its verdict runs out.
+    """
+
+    def __init__(self, path: str = DEFAULT_FORMATS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS provider_formats (
+                provider TEXT NOT NULL,
+                endpoint TEXT NOT NULL,
+                variant TEXT NOT NULL,
+                ok INTEGER NOT NULL,
+                detail TEXT NOT NULL,
+                checked_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (provider, endpoint, variant)
+            )
+        """)
+        self._conn.commit()
+
+    def known_good(self, provider: str, endpoint: str) -> Optional[str]:
+        """Most recently confirmed variant that has not expired, if any."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT variant FROM provider_formats "
+                "WHERE provider=? AND endpoint=? AND ok=1 AND expires_at>=? "
+                "ORDER BY checked_at DESC LIMIT 1",
+                (provider, endpoint, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def failed(self, provider: str, endpoint: str) -> Set[str]:
+        """Variants whose last request failed and whose failure has not expired."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT variant FROM provider_formats "
+                "WHERE provider=? AND endpoint=? AND ok=0 AND expires_at>=?",
+                (provider, endpoint, time.time())
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def record(self, provider: str, endpoint: str, variant: str, ok: bool,
+               ttl_seconds: float, detail: str = ''):
+        """Remember the outcome of a request with `variant` for ttl_seconds."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO provider_formats VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (provider, endpoint, variant, int(ok), detail[:500], now, now + ttl_seconds)
+            )
+            self._conn.commit()
+
+    def entries(self, provider: Optional[str] = None) -> List[Dict]:
+        """Every unexpired verdict, newest first."""
+        query = "SELECT provider, endpoint, variant, ok, detail, checked_at, expires_at FROM provider_formats WHERE expires_at>=?"
+        args = [time.time()]
+        if provider is not None:
+            query += " AND provider=?"
+            args.append(provider)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY checked_at DESC", args).fetchall()
+        return [
+            {'provider': p, 'endpoint': e, 'variant': v, 'ok': bool(ok), 'detail': d,
+             'checked_at': checked, 'expires_at': expires}
+            for p, e, v, ok, d, checked, expires in rows
+        ]
+
+    def stats(self) -> Dict:
+        entries = self.entries()
+        return {
+            'known_good': [e for e in entries if e['ok']],
+            'failed': [e for e in entries if not e['ok']]
+        }
+
+
+_default_formats = None
+_default_formats_lock = threading.Lock()
+
+
+def get_default_formats() -> ProviderFormatCache:
+    """Process-wide format cache shared by every provider fetcher."""
+    global _default_formats
+    with _default_formats_lock:
+        if _default_formats is None:
+            _default_formats = ProviderFormatCache(os.environ.get('PROVIDER_FORMATS_PATH', DEFAULT_FORMATS_PATH))
+        return _default_formats
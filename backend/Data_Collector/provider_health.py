@@ -0,0 +1,227 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from Serving.metrics import get_metrics
+
+# Breaker settings shared by every provider, overridable from the environment
+FAILURE_THRESHOLD = int(os.environ.get('PROVIDER_FAILURE_THRESHOLD', 5))  # Consecutive failures that open a circuit
+RESET_TIMEOUT_SECONDS = float(os.environ.get('PROVIDER_RESET_SECONDS', 30))  # Open time before a probe is let through
+HALF_OPEN_PROBES = int(os.environ.get('PROVIDER_HALF_OPEN_PROBES', 1))  # Probes in flight while half-open
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderUnavailable(Exception):
+    """Raised instead of calling a provider whose circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Health of one upstream provider.
+
+    Closed: every call goes through. After failure_threshold consecutive
+    failures the circuit opens and calls are rejected without touching the
+    provider. Once reset_timeout has passed it is half-open: up to
+    half_open_probes calls go through, and the first outcome closes the
+    circuit again or reopens it for another reset_timeout.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = FAILURE_THRESHOLD,
+                 reset_timeout: float = RESET_TIMEOUT_SECONDS, half_open_probes: int = HALF_OPEN_PROBES):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.last_error = ''
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go to the provider now; every allowed call must end in one record_*()."""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._probes = 0
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.successes += 1
+            self.consecutive_failures = 0
+            if self.state != CLOSED:
+                logger.info("Provider %s recovered, closing circuit", self.name)
+            self.state = CLOSED
+
+    def record_failure(self, error: str = ''):
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_error = error.split('\n', 1)[0][:200]
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.consecutive_failures >= self.failure_threshold):
+                if self.state == CLOSED:
+                    logger.warning("Provider %s failed %d times in a row, opening circuit: %s",
+                                   self.name, self.consecutive_failures, self.last_error)
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def record_cancelled(self):
+        """An allowed call was abandoned (e.g. it lost a hedge); it says nothing about the provider."""
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            retry_in = self.reset_timeout - (time.monotonic() - self.opened_at) if self.state == OPEN else 0.0
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'retry_in_seconds': round(max(retry_in, 0.0), 1),
+                'last_error': self.last_error,
+                'successes': self.successes,
+                'failures': self.failures,
+                'rejected': self.rejected
+            }
+
+
+class ProviderHealth:
+    """Circuit breakers for every upstream provider, created on first use."""
+
+    def __init__(self, **breaker_options):
+        self.breaker_options = breaker_options
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, provider: str) -> CircuitBreaker:
+        breaker = self._breakers.get(provider)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(provider, CircuitBreaker(provider, **self.breaker_options))
+        return breaker
+
+    async def call(self, provider: str, fn: Callable[[], Awaitable[Any]], budget: Optional[float] = None) -> Any:
+        """
+        Await fn() through the provider's circuit breaker.
+
+        Args:
+            provider: Provider name, e.g. 'power'
+            fn: Starts the request; any exception it raises counts as a provider failure
+            budget: Seconds to wait before giving up (and counting a failure), None to rely on fn's own timeout
+
+        Raises:
+            ProviderUnavailable: The circuit is open, so fn was not called
+        """
+        breaker = self.breaker(provider)
+        if not breaker.allow():
+            _count(provider, 'rejected')
+            raise ProviderUnavailable(f"{provider} circuit is open ({breaker.last_error})")
+        try:
+            if budget is None:
+                result = await fn()
+            else:
+                result = await asyncio.wait_for(fn(), budget)
+        except asyncio.CancelledError:
+            breaker.record_cancelled()
+            _count(provider, 'cancelled')
+            raise
+        except asyncio.TimeoutError:
+            breaker.record_failure(f"no answer within {budget}s")
+            _count(provider, 'failure')
+            raise
+        except Exception as e:
+            breaker.record_failure(f"{type(e).__name__}: {e}")
+            _count(provider, 'failure')
+            raise
+        breaker.record_success()
+        _count(provider, 'success')
+        return result
+
+    def open_circuits(self) -> int:
+        return sum(breaker.state != CLOSED for breaker in list(self._breakers.values()))
+
+    def stats(self) -> Dict:
+        return {name: breaker.stats() for name, breaker in sorted(self._breakers.items())}
+
+
+def _count(provider: str, result: str):
+    get_metrics().count('weather_provider_calls_total', provider=provider, result=result)
+
+
+async def hedged(name: str, primary: Callable[[], Awaitable[Any]], fallback: Callable[[], Awaitable[Any]],
+                 hedge_after: Optional[float]) -> Any:
+    """
+    Result of primary(), starting fallback() too if primary is slow or fails.
+
+    The fallback starts as soon as the primary raises, or once hedge_after
+    seconds pass without an answer (never, if hedge_after is None). The
+    first successful result wins and the other call is cancelled. If both
+    fail, the fallback's exception is raised.
+
+    Args:
+        name: Label for the weather_hedges_total counter
+        primary: Preferred source
+        fallback: Source used when the primary is slow or down
+        hedge_after: Seconds to wait for the primary alone
+    """
+    primary_task = _start(primary)
+    fallback_task = None
+    try:
+        # Wait for the primary alone until the hedge delay
+        done, _ = await asyncio.wait({primary_task}, timeout=hedge_after)
+        if done and primary_task.exception() is None:
+            get_metrics().count('weather_hedges_total', source=name, winner='primary', hedged='false')
+            return primary_task.result()
+        if done:
+            logger.info("%s primary failed, using fallback: %s", name, primary_task.exception())
+        else:
+            logger.info("%s primary slower than %ss, starting fallback", name, hedge_after)
+        fallback_task = _start(fallback)
+
+        pending = {task for task in (primary_task, fallback_task) if not task.done()}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in (primary_task, fallback_task):
+                if task in done and task.exception() is None:
+                    winner = 'primary' if task is primary_task else 'fallback'
+                    get_metrics().count('weather_hedges_total', source=name, winner=winner, hedged='true')
+                    return task.result()
+    finally:
+        for task in (primary_task, fallback_task):
+            if task is not None and not task.done():
+                task.cancel()
+    get_metrics().count('weather_hedges_total', source=name, winner='none', hedged='true')
+    raise fallback_task.exception()
+
+
+def _start(fn: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+    task = asyncio.ensure_future(fn())
+    # Mark the loser's exception as retrieved so it is not logged as never retrieved
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    return task
+
+_provider_health = ProviderHealth()
+
+
+def get_provider_health() -> ProviderHealth:
+    """Breakers shared by every fetcher in the process."""
+    return _provider_health
@@ -2,8 +2,9 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from Data_Collector.data_fetcher import DataFetcher
+from Data_Collector.dataset_builder import build_dataset, load_location
 from Prediction_Modeller.prec_modeler import PrecipitationModel
+from Prediction_Modeller import numpy_lstm
 import pandas as pd
 
 print("=" * 50)
@@ -17,20 +18,17 @@ locations = [
     {"name": "Vancouver", "lat": 49.2827, "lon": -123.1207},
     {"name": "Montreal", "lat": 45.5017, "lon": -73.5673},
 ]
+years = list(range(2020, 2025))
 
-# Fetch 5 years of data
+# Fetch 5 years of data, one shard per location and year (existing shards are reused)
 print("\n1. Fetching 5 years of data from multiple locations...")
-fetcher = DataFetcher()
-all_data = []
+report = build_dataset(locations, years)
+if report['failed']:
+    print(f"   ⚠ Failed shards (rerun to retry): {', '.join(report['failed'])}")
 
+all_data = []
 for loc in locations:
-    print(f"   Fetching {loc['name']}...")
-    df = fetcher.fetch_data(
-        latitude=loc['lat'],
-        longitude=loc['lon'],
-        start_date='20200101',
-        end_date='20241231',
-    )
+    df = load_location(loc, years)
     if df is not None and len(df) > 0:
         all_data.append(df)
         print(f"   ✓ {loc['name']}: {len(df)} rows")
@@ -59,10 +57,13 @@ metrics = model.train(X, y)
 
 print(f"\n4. Saving model...")
 model.save('trained_precipitation_model.pkl')
+weights_path = model.export_numpy('trained_precipitation_model.pkl')
+max_diff = numpy_lstm.verify_against_keras(model, weights_path)
+print(f"   ✓ NumPy backend matches Keras (max abs diff {max_diff:.2e})")
 
 print("\n" + "=" * 50)
 print("TRAINING COMPLETE!")
 print(f"R² Score: {metrics['r2_score']:.3f}")
 print(f"MSE: {metrics['mse']:.3f}")
 print(f"Training samples: {len(X)}")
-print("=" * 50)
\ No newline at end of file
+print("=" * 50)
@@ -0,0 +1,195 @@
+import logging
+import numpy as np
+from typing import Dict, List, Optional
+
+# Activations used by the Keras layers we export
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0),
+    'tanh': np.tanh,
+    'sigmoid': lambda x: 1 / (1 + np.exp(-x)),
+}
+
+logger = logging.getLogger(__name__)
+
+
+class NumpyScaler:
+    """StandardScaler.transform without scikit-learn."""
+
+    def __init__(self, mean: np.ndarray, scale: np.ndarray):
+        self.mean_ = mean
+        self.scale_ = scale
+
+    def transform(self, X) -> np.ndarray:
+        return (np.asarray(X, dtype=np.float32) - self.mean_) / self.scale_
+
+    def freeze(self):
+        self.mean_.setflags(write=False)
+        self.scale_.setflags(write=False)
+
+
+class NumpyLSTMModel:
+    """
+    NumPy forward pass for a Sequential stack of LSTM, Dropout and Dense layers.
+
+    Called like a Keras model: model(X, training=True) applies fresh
+    dropout masks on every call, so Monte Carlo Dropout works unchanged.
+    """
+
+    def __init__(self, layers: List[Dict], seed: Optional[int] = None):
+        self.layers = layers
+        self.rng = np.random.default_rng(seed)
+
+    def reseed(self, seed=None):
+        """Start a new dropout mask stream, e.g. in a forked worker that inherited its parent's."""
+        self.rng = np.random.default_rng(seed)
+
+    def freeze(self):
+        """Make the weights read-only so forked workers keep sharing their pages."""
+        for layer in self.layers:
+            for value in layer.values():
+                if isinstance(value, np.ndarray):
+                    value.setflags(write=False)
+
+    def _lstm(self, layer: Dict, X: np.ndarray) -> np.ndarray:
+        units = layer['recurrent'].shape[0]
+        activation = ACTIVATIONS[layer['activation']]
+        recurrent_activation = ACTIVATIONS[layer['recurrent_activation']]
+
+        # Input projection for every timestep at once; gate order is i, f, c, o
+        Z = X @ layer['kernel'] + layer['bias']
+        h = np.zeros((X.shape[0], units), dtype=X.dtype)
+        c = np.zeros((X.shape[0], units), dtype=X.dtype)
+        outputs = []
+        for t in range(X.shape[1]):
+            gates = Z[:, t] + h @ layer['recurrent']
+            i = recurrent_activation(gates[:, :units])
+            f = recurrent_activation(gates[:, units:2 * units])
+            g = activation(gates[:, 2 * units:3 * units])
+            o = recurrent_activation(gates[:, 3 * units:])
+            c = f * c + i * g
+            h = o * activation(c)
+            if layer['return_sequences']:
+                outputs.append(h)
+        return np.stack(outputs, axis=1) if layer['return_sequences'] else h
+
+    def __call__(self, X, training: bool = False) -> np.ndarray:
+        out = np.asarray(X, dtype=np.float32)
+        for layer in self.layers:
+            if layer['type'] == 'lstm':
+                out = self._lstm(layer, out)
+            elif layer['type'] == 'dense':
+                out = ACTIVATIONS[layer['activation']](out @ layer['kernel'] + layer['bias'])
+            elif layer['type'] == 'dropout' and training:
+                keep = 1 - layer['rate']
+                out = out * (self.rng.random(out.shape, dtype=np.float32) < keep) / keep
+        return out
+
+
+def save_weights(path: str, layers: List[Dict], scaler_mean: np.ndarray, scaler_scale: np.ndarray,
+                 feature_names: List[str], sequence_length: int):
+    """Write layers in the NumpyLSTMModel format, with the scaler and feature layout, to one .npz."""
+    arrays = {
+        'scaler_mean': np.asarray(scaler_mean, dtype=np.float32),
+        'scaler_scale': np.asarray(scaler_scale, dtype=np.float32),
+        'feature_names': np.array(feature_names, dtype=str),
+        'sequence_length': np.array(sequence_length),
+    }
+    specs = []
+    for i, layer in enumerate(layers):
+        if layer['type'] == 'lstm':
+            arrays.update({f'{i}_kernel': layer['kernel'], f'{i}_recurrent': layer['recurrent'], f'{i}_bias': layer['bias']})
+            specs.append(f"lstm|{layer['activation']}|{layer['recurrent_activation']}|{int(layer['return_sequences'])}")
+        elif layer['type'] == 'dense':
+            arrays.update({f'{i}_kernel': layer['kernel'], f'{i}_bias': layer['bias']})
+            specs.append(f"dense|{layer['activation']}")
+        else:
+            specs.append(f"dropout|{layer['rate']}")
+    arrays['layers'] = np.array(specs, dtype=str)
+    np.savez(path, **arrays)
+
+
+def export_weights(model, path: str):
+    """
+    Write a trained PrecipitationModel's Keras weights and scaler to one .npz.
+
+    Args:
+        model: Trained PrecipitationModel (Keras backend)
+        path: Output path, e.g. trained_precipitation_model_weights.npz
+    """
+    layers = []
+    for layer in model.model.layers:
+        kind = type(layer).__name__.lower()
+        config = layer.get_config()
+        if kind == 'lstm':
+            kernel, recurrent, bias = layer.get_weights()
+            layers.append({
+                'type': 'lstm', 'kernel': kernel, 'recurrent': recurrent, 'bias': bias,
+                'activation': config['activation'],
+                'recurrent_activation': config['recurrent_activation'],
+                'return_sequences': config['return_sequences'],
+            })
+        elif kind == 'dense':
+            kernel, bias = layer.get_weights()
+            layers.append({'type': 'dense', 'kernel': kernel, 'bias': bias, 'activation': config['activation']})
+        elif kind == 'dropout':
+            layers.append({'type': 'dropout', 'rate': config['rate']})
+        else:
+            raise ValueError(f"Cannot export layer type {type(layer).__name__}")
+    save_weights(path, layers, model.scaler.mean_, model.scaler.scale_,
+                 model.feature_names, model.sequence_length)
+    logger.info("Exported NumPy weights to %s", path)
+
+
+def load_weights(path: str) -> Dict:
+    """
+    Load an export_weights file.
+
+    Returns:
+        {'model': NumpyLSTMModel, 'scaler': NumpyScaler, 'feature_names': [...], 'sequence_length': int}
+    """
+    with np.load(path) as data:
+        layers = []
+        for i, spec in enumerate(data['layers']):
+            kind, *args = str(spec).split('|')
+            if kind == 'lstm':
+                layers.append({
+                    'type': 'lstm',
+                    'kernel': data[f'{i}_kernel'].astype(np.float32),
+                    'recurrent': data[f'{i}_recurrent'].astype(np.float32),
+                    'bias': data[f'{i}_bias'].astype(np.float32),
+                    'activation': args[0],
+                    'recurrent_activation': args[1],
+                    'return_sequences': args[2] == '1',
+                })
+            elif kind == 'dense':
+                layers.append({
+                    'type': 'dense',
+                    'kernel': data[f'{i}_kernel'].astype(np.float32),
+                    'bias': data[f'{i}_bias'].astype(np.float32),
+                    'activation': args[0],
+                })
+            else:
+                layers.append({'type': 'dropout', 'rate': float(args[0])})
+
+        return {
+            'model': NumpyLSTMModel(layers),
+            'scaler': NumpyScaler(data['scaler_mean'], data['scaler_scale']),
+            'feature_names': [str(name) for name in data['feature_names']],
+            'sequence_length': int(data['sequence_length']),
+        }
+
+
+def verify_against_keras(model, path: str, n_sequences: int = 64, seed: int = 0) -> float:
+    """
+    Compare the exported NumPy model with the Keras model on random scaled inputs.
+
+    Returns:
+        Max absolute difference of the deterministic (no dropout) outputs
+    """
+    exported = load_weights(path)
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((n_sequences, model.sequence_length, len(model.feature_names))).astype(np.float32)
+    expected = np.asarray(model.model(X, training=False))
+    actual = exported['model'](X, training=False)
+    return float(np.max(np.abs(expected - actual)))
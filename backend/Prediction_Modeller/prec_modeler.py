@@ -1,14 +1,44 @@
 import numpy as np
 import pandas as pd
-from tensorflow import keras
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Dropout
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_squared_error, r2_score
+import bisect
 import pickle
 import os
-from typing import Dict, Optional
+import logging
+from typing import Dict, List, Optional, Tuple
+from Prediction_Modeller import numpy_lstm
+from Serving.metrics import get_metrics
+
+# Lag/rolling feature definitions used by engineer_features
+LAG_FEATURES = ['T2M', 'RH2M', 'PS', 'WS10M']
+LAGS = [1, 6]
+ROLL_FEATURES = ['T2M', 'RH2M', 'PS']
+ROLL_WINDOW = 6
+TARGET = 'PRECTOTCORR'
+
+# TensorFlow is imported lazily: only training and the 'keras' backend need it
+MODEL_BACKENDS = ('auto', 'keras', 'numpy')
+
+# Classification tables: (upper bounds, labels), where labels[i] applies below bounds[i]
+# and the last label from the last bound up
+DRY_BELOW_MM = 0.1  # Less precipitation than this is 'none'
+PRECIP_TYPES = ((-2, 2), ('snow', 'mixed', 'rain'))  # By temperature in °C
+INTENSITIES = {  # By precipitation in mm, per precipitation type
+    'snow': ((1, 5), ('light', 'moderate', 'heavy')),
+    'default': ((2.5, 7.5), ('light', 'moderate', 'heavy')),
+}
+
+logger = logging.getLogger(__name__)
+
+
+def engineered_names(raw_columns: List[str]) -> List[str]:
+    """Column order produced by engineer_features for the given raw columns."""
+    names = list(raw_columns) + ['hour', 'day_of_year', 'month']
+    names += [f'{feature}_lag{lag}' for feature in LAG_FEATURES for lag in LAGS]
+    names += [f'{feature}_roll{ROLL_WINDOW}' for feature in ROLL_FEATURES]
+    return names
 
 
 class PrecipitationModel:
@@ -18,23 +48,32 @@ class PrecipitationModel:
         self.is_trained = False
         self.feature_names = None
         self.sequence_length = 24  # Use last 24 hours to predict next hour
+        self.max_batch_size = 4096  # Max sequences per forward pass
+        self.version = None  # Identifies the loaded weights, e.g. for caching forecasts
         
     def engineer_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy()
+        with get_metrics().timer('engineer_features'):
+            return self._engineer_features(df)
+
+    def _engineer_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        features = {}
         
         # Time-based features
-        df['hour'] = df.index.hour
-        df['day_of_year'] = df.index.dayofyear
-        df['month'] = df.index.month
+        features['hour'] = df.index.hour
+        features['day_of_year'] = df.index.dayofyear
+        features['month'] = df.index.month
         
         # Lagged features
-        for feature in ['T2M', 'RH2M', 'PS', 'WS10M']:
-            df[f'{feature}_lag1'] = df[feature].shift(1)
-            df[f'{feature}_lag6'] = df[feature].shift(6)
+        for feature in LAG_FEATURES:
+            for lag in LAGS:
+                features[f'{feature}_lag{lag}'] = df[feature].shift(lag)
         
         # Rolling averages
-        for feature in ['T2M', 'RH2M', 'PS']:
-            df[f'{feature}_roll6'] = df[feature].rolling(window=6).mean()
+        for feature in ROLL_FEATURES:
+            features[f'{feature}_roll{ROLL_WINDOW}'] = df[feature].rolling(window=ROLL_WINDOW).mean()
+        
+        # Add all new columns at once instead of copying and inserting one by one
+        df = pd.concat([df, pd.DataFrame(features, index=df.index)], axis=1)
         
         # Drop NaN
         df = df.dropna()
@@ -42,29 +81,67 @@ class PrecipitationModel:
         return df
     
     def create_sequences(self, X, y):
-        """Create sequences for LSTM input"""
-        X_seq, y_seq = [], []
-        for i in range(len(X) - self.sequence_length):
-            X_seq.append(X[i:i + self.sequence_length])
-            y_seq.append(y[i + self.sequence_length])
-        return np.array(X_seq), np.array(y_seq)
-    
-    def train(self, X: pd.DataFrame, y: pd.Series) -> Dict:
+        """
+        Create sequences for LSTM input as zero-copy sliding-window views.
+        
+        X_seq[i] is X[i:i + sequence_length] and y_seq[i] is y[i + sequence_length];
+        both share memory with the inputs, so copy before writing to them.
+        """
+        X = np.asarray(X)
+        windows = np.lib.stride_tricks.sliding_window_view(X, self.sequence_length, axis=0)
+        # sliding_window_view puts the window axis last: (N, features, seq) -> (N, seq, features)
+        X_seq = windows[:len(X) - self.sequence_length].transpose(0, 2, 1)
+        y_seq = np.asarray(y)[self.sequence_length:]
+        return X_seq, y_seq
+    
+    def sequence_dataset(self, X_scaled, y, indices: np.ndarray,
+                         batch_size: int = 64, shuffle: bool = False):
+        """
+        Stream (window, target) batches for the given sequence start indices.
+        
+        Windows are gathered from the scaled feature matrix per batch, so only
+        one batch of sequences is materialised at a time.
+        """
+        import tensorflow as tf
+        
+        offsets = tf.range(self.sequence_length, dtype=tf.int64)
+        
+        def gather(idx):
+            return tf.gather(X_scaled, idx[:, None] + offsets), tf.gather(y, idx + self.sequence_length)
+        
+        ds = tf.data.Dataset.from_tensor_slices(indices.astype(np.int64))
+        if shuffle:
+            ds = ds.shuffle(len(indices), reshuffle_each_iteration=True)
+        return ds.batch(batch_size).map(gather, num_parallel_calls=tf.data.AUTOTUNE).prefetch(tf.data.AUTOTUNE)
+    
+    def train(self, X: pd.DataFrame, y: pd.Series, epochs: int = 50, batch_size: int = 64) -> Dict:
+        import tensorflow as tf
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import LSTM, Dense, Dropout
+        
         self.feature_names = list(X.columns)
         
         # Scale features
-        X_scaled = self.scaler.fit_transform(X)
+        X_scaled = self.scaler.fit_transform(X).astype(np.float32)
+        y_values = np.asarray(y, dtype=np.float32)
         
-        # Create sequences
-        print(f"Creating sequences with length {self.sequence_length}...")
-        X_seq, y_seq = self.create_sequences(X_scaled, y.values)
+        # Sequences are referenced by start index instead of being copied out
+        n_sequences = len(X_scaled) - self.sequence_length
+        print(f"Indexing {n_sequences} sequences with length {self.sequence_length}...")
         
-        print(f"Sequence shape: {X_seq.shape}")
-        
-        # Train/test split
-        X_train, X_test, y_train, y_test = train_test_split(
-            X_seq, y_seq, test_size=0.2, random_state=42
+        # Train/test split (same partition as splitting materialised sequences)
+        train_idx, test_idx = train_test_split(
+            np.arange(n_sequences), test_size=0.2, random_state=42
         )
+        # Hold out the last 10% of the training set for validation, like validation_split
+        split_at = int(len(train_idx) * 0.9)
+        train_idx, val_idx = train_idx[:split_at], train_idx[split_at:]
+        
+        X_tensor = tf.constant(X_scaled)
+        y_tensor = tf.constant(y_values)
+        train_ds = self.sequence_dataset(X_tensor, y_tensor, train_idx, batch_size, shuffle=True)
+        val_ds = self.sequence_dataset(X_tensor, y_tensor, val_idx, batch_size)
+        test_ds = self.sequence_dataset(X_tensor, y_tensor, test_idx, batch_size)
         
         # Build LSTM model
         print("Building LSTM model...")
@@ -79,17 +156,17 @@ class PrecipitationModel:
         
         self.model.compile(optimizer='adam', loss='mse', metrics=['mae'])
         
-        print(f"Training LSTM on {len(X_train)} sequences...")
+        print(f"Training LSTM on {len(train_idx)} sequences...")
         history = self.model.fit(
-            X_train, y_train,
-            epochs=50,
-            batch_size=64,
-            validation_split=0.1,
+            train_ds,
+            epochs=epochs,
+            validation_data=val_ds,
             verbose=1
         )
         
         # Evaluate
-        y_pred = self.model.predict(X_test)
+        y_test = y_values[test_idx + self.sequence_length]
+        y_pred = self.model.predict(test_ds)
         mse = mean_squared_error(y_test, y_pred)
         r2 = r2_score(y_test, y_pred)
         
@@ -98,55 +175,189 @@ class PrecipitationModel:
         return {
             'mse': mse,
             'r2_score': r2,
-            'train_samples': len(X_train),
-            'test_samples': len(X_test)
+            'train_samples': len(train_idx) + len(val_idx),
+            'test_samples': len(test_idx)
         }
     
-    def predict(self, X: pd.DataFrame, n_samples=50) -> tuple:
+    def mc_samples(self, X_seq: np.ndarray, n_samples: int = 50) -> np.ndarray:
+        """
+        Run all Monte Carlo Dropout passes as one batched forward pass.
+    
+        Each input sequence is tiled n_samples times along the batch axis, so
+        dropout draws an independent mask for every copy. Sequences are tiled
+        a chunk at a time, so at most max_batch_size copies exist at once.
+    
+        Args:
+            X_seq: Scaled sequences of shape (batch, sequence_length, features)
+            n_samples: Number of stochastic passes per sequence
+        
+        Returns:
+            np.ndarray of shape (batch, n_samples)
+        """
+        batch_size = X_seq.shape[0]
+        rows = max(1, self.max_batch_size // n_samples)  # Sequences whose copies fit one forward pass
+        preds = []
+        with get_metrics().timer('model_inference'):
+            for start in range(0, batch_size, rows):
+                X_tiled = np.repeat(X_seq[start:start + rows], n_samples, axis=0)
+                # training=True keeps dropout active during inference
+                preds.extend(
+                    np.asarray(self.model(X_tiled[i:i + self.max_batch_size], training=True))
+                    for i in range(0, len(X_tiled), self.max_batch_size)
+                )
+        return np.concatenate(preds).reshape(batch_size, n_samples)
+    
+    def predict(self, X: pd.DataFrame, n_samples=50, quantiles=None) -> tuple:
         """
         Make prediction with uncertainty estimate using Monte Carlo Dropout.
     
         Args:
             X: Feature dataframe
             n_samples: Number of forward passes for uncertainty estimation
+            quantiles: Optional list of quantiles (0-1) to compute over the samples
         
         Returns:
-            tuple: (mean_prediction, std_prediction)
+            tuple: (mean_prediction, std_prediction), or
+                   (mean_prediction, std_prediction, {quantile: value}) if quantiles given
         """
-        print(f"🔄 PREDICT METHOD CALLED: X shape={X.shape}, n_samples={n_samples}")
-    
         if not self.is_trained:
             raise ValueError("Model not trained")
     
-        print(f"✓ Model is trained, scaling features...")
-        X_scaled = self.scaler.transform(X)
+        with get_metrics().timer('scaling'):
+            X_scaled = self.scaler.transform(X)
     
         if len(X_scaled) < self.sequence_length:
             raise ValueError(f"Need at least {self.sequence_length} rows for prediction")
     
-        print(f"✓ Creating sequence from last {self.sequence_length} rows...")
         X_seq = X_scaled[-self.sequence_length:].reshape(1, self.sequence_length, -1)
-        print(f"✓ Sequence shape: {X_seq.shape}")
-    
-        # Monte Carlo Dropout: run prediction multiple times with dropout enabled
-        print(f"Starting Monte Carlo Dropout with {n_samples} samples...")
-        predictions = []
-        for i in range(n_samples):
-            if i % 10 == 0:
-                print(f"  Sample {i}/{n_samples}...")
-            # training=True keeps dropout active during inference
-            pred = self.model(X_seq, training=True)
-            predictions.append(pred.numpy()[0][0])
-    
-        print(f"✓ Completed {n_samples} predictions, calculating statistics...")
+    
+        # Monte Carlo Dropout: all samples in a single batched forward pass
+        predictions = self.mc_samples(X_seq, n_samples)[0]
         mean_pred = np.mean(predictions)
         std_pred = np.std(predictions)
     
-        print(f"✓ PREDICTION COMPLETE: mean={mean_pred:.4f}, std={std_pred:.4f}")
-        return mean_pred, std_pred
+        logger.debug("Prediction complete (%d samples): mean=%.4f, std=%.4f", n_samples, mean_pred, std_pred)
+        if quantiles is None:
+            return mean_pred, std_pred
+    
+        quantile_values = np.quantile(predictions, quantiles)
+        return mean_pred, std_pred, dict(zip(quantiles, quantile_values.tolist()))
+
+    def horizon_windows(self, X: pd.DataFrame, hours: int, first: int = 0) -> Tuple[np.ndarray, pd.DatetimeIndex]:
+        """
+        Scaled input windows for each of the next `hours` hours after the last row of X.
+    
+        The rollout extends the raw observations hour by hour, holding the
+        weather drivers (T2M, RH2M, PS, WS10M) at their last observed value and
+        advancing the time features, and runs the extended frame through
+        engineer_features once. Precipitation itself is not a model input,
+        so the future windows do not depend on earlier predictions. Every
+        feature only looks back, so the window for an hour is the same however
+        far the rollout goes, and a forecast can be extended later by asking
+        for the hours from `first` on.
+    
+        Args:
+            X: Raw hourly observations (as returned by DataFetcher), DatetimeIndex
+            hours: Number of hours to forecast
+            first: Hours already forecast, whose windows are skipped
+        
+        Returns:
+            tuple: (windows of shape (hours - first, sequence_length, features), their forecast timestamps)
+        """
+        X = X.drop(columns='PRECTOTCORR', errors='ignore')
+        last_ts = X.index[-1]
+        future_index = pd.date_range(last_ts + pd.Timedelta(hours=1), periods=hours, freq='h')
+        future = pd.DataFrame(
+            np.repeat(X.iloc[[-1]].to_numpy(), hours, axis=0),
+            index=future_index,
+            columns=X.columns
+        )
+    
+        df_eng = self.engineer_features(pd.concat([X, future]))
+        if self.feature_names:
+            df_eng = df_eng[self.feature_names]
+        with get_metrics().timer('scaling'):
+            X_scaled = self.scaler.transform(df_eng)
+    
+        # Forecast for hour j uses the window ending just before it
+        start = len(X_scaled) - hours
+        if start < self.sequence_length:
+            raise ValueError(f"Need at least {self.sequence_length} engineered rows for prediction")
+    
+        windows = np.stack([
+            X_scaled[start + j - self.sequence_length:start + j]
+            for j in range(first, hours)
+        ])
+        return windows, future_index[first:]
+
+    def predict_windows(self, batches: List[Tuple[np.ndarray, pd.DatetimeIndex]],
+                        n_samples=50, quantiles=None) -> List[pd.DataFrame]:
+        """
+        Forecast several window sets (e.g. one per location) in one batched pass.
+    
+        All windows are stacked into a single (B, sequence_length, features)
+        batch, so every location and every MC sample shares one forward pass.
+    
+        Args:
+            batches: (windows, forecast timestamps) pairs from horizon_windows
+            n_samples: Number of MC Dropout passes per hour
+            quantiles: Optional list of quantiles (0-1) to add as columns
+        
+        Returns:
+            One DataFrame per pair, indexed by forecast timestamp with 'mean'
+            and 'std' columns, plus one 'q<quantile>' column per requested quantile
+        """
+        if not self.is_trained:
+            raise ValueError("Model not trained")
+    
+        samples = self.mc_samples(np.concatenate([windows for windows, _ in batches]), n_samples)
+        return self.summarize_samples(batches, samples, quantiles)
+
+    def summarize_samples(self, batches: List[Tuple[np.ndarray, pd.DatetimeIndex]],
+                          samples: np.ndarray, quantiles=None) -> List[pd.DataFrame]:
+        """Split stacked MC samples of shape (B, n_samples) back into one forecast per pair."""
+        results = []
+        offset = 0
+        for windows, index in batches:
+            item_samples = samples[offset:offset + len(windows)]
+            offset += len(windows)
+            result = pd.DataFrame({
+                'mean': item_samples.mean(axis=1),
+                'std': item_samples.std(axis=1)
+            }, index=index)
+            if quantiles is not None:
+                for q, values in zip(quantiles, np.quantile(item_samples, quantiles, axis=1)):
+                    result[f'q{q}'] = values
+            results.append(result)
+        return results
+
+    def predict_horizon(self, X: pd.DataFrame, hours: int, n_samples=50, quantiles=None) -> pd.DataFrame:
+        """
+        Forecast each of the next `hours` hours after the last row of X.
+    
+        All horizons (times all MC samples) are evaluated in one batched
+        pass; see horizon_windows for how the future inputs are built.
+    
+        Args:
+            X: Raw hourly observations (as returned by DataFetcher), DatetimeIndex
+            hours: Number of hours to forecast
+            n_samples: Number of MC Dropout passes per hour
+            quantiles: Optional list of quantiles (0-1) to add as columns
+        
+        Returns:
+            DataFrame indexed by forecast timestamp with 'mean' and 'std'
+            columns, plus one 'q<quantile>' column per requested quantile
+        """
+        if not self.is_trained:
+            raise ValueError("Model not trained")
+    
+        result = self.predict_windows([self.horizon_windows(X, hours)], n_samples, quantiles)[0]
+    
+        logger.debug("Horizon prediction complete: %d hours x %d samples", hours, n_samples)
+        return result
 
     def save(self, filepath: str):
-    # Save as .keras format instead of .h5
+        # Save as .keras format instead of .h5
         self.model.save(filepath.replace('.pkl', '_lstm.keras'))
         with open(filepath, 'wb') as f:
             pickle.dump({
@@ -157,17 +368,66 @@ class PrecipitationModel:
             }, f)
         print(f"Model saved to {filepath}")
 
-    def load(self, filepath: str):
-        # Try .keras first, fall back to .h5
+    def export_numpy(self, filepath: str) -> str:
+        """
+        Export the Keras weights and scaler for the NumPy inference backend.
+        
+        Args:
+            filepath: Model .pkl path; weights go next to it as <name>_weights.npz
+        
+        Returns:
+            Path of the written .npz
+        """
+        weights_path = filepath.replace('.pkl', '_weights.npz')
+        numpy_lstm.export_weights(self, weights_path)
+        return weights_path
+
+    def load(self, filepath: str, backend: str = 'auto'):
+        """
+        Load a saved model.
+        
+        Args:
+            filepath: Model .pkl path
+            backend: 'keras' loads the Keras model, 'numpy' the exported
+                     <name>_weights.npz without importing TensorFlow, and 'auto'
+                     uses the export when it is at least as new as the Keras model
+        """
+        if backend not in MODEL_BACKENDS:
+            raise ValueError(f"Unknown model backend {backend!r}, expected one of {MODEL_BACKENDS}")
+        
         keras_path = filepath.replace('.pkl', '_lstm.keras')
         h5_path = filepath.replace('.pkl', '_lstm.h5')
-    
+        weights_path = filepath.replace('.pkl', '_weights.npz')
+        
+        if backend == 'auto':
+            keras_mtimes = [os.path.getmtime(p) for p in (keras_path, h5_path) if os.path.exists(p)]
+            fresh = os.path.exists(weights_path) and os.path.getmtime(weights_path) >= max(keras_mtimes, default=0)
+            backend = 'numpy' if fresh else 'keras'
+        
+        if backend == 'numpy':
+            if not os.path.exists(weights_path):
+                raise FileNotFoundError(f"No exported weights found at {weights_path}")
+            exported = numpy_lstm.load_weights(weights_path)
+            self.model = exported['model']
+            self.scaler = exported['scaler']
+            self.feature_names = exported['feature_names']
+            self.sequence_length = exported['sequence_length']
+            self.is_trained = True
+            self.version = f"{os.path.basename(weights_path)}@{int(os.path.getmtime(weights_path))}"
+            print(f"Model loaded from {weights_path} (NumPy backend)")
+            return
+        
+        from tensorflow import keras
+        
+        # Try .keras first, fall back to .h5
         if os.path.exists(keras_path):
             self.model = keras.models.load_model(keras_path)
+            model_path = keras_path
         elif os.path.exists(h5_path):
             self.model = keras.models.load_model(h5_path, compile=False)
             # Recompile with compatible metrics
             self.model.compile(optimizer='adam', loss='mse', metrics=['mae'])
+            model_path = h5_path
         else:
             raise FileNotFoundError(f"No model file found at {keras_path} or {h5_path}")
     
@@ -177,32 +437,61 @@ class PrecipitationModel:
         self.feature_names = data['feature_names']
         self.sequence_length = data['sequence_length']
         self.is_trained = True
+        self.version = f"{os.path.basename(model_path)}@{int(os.path.getmtime(model_path))}"
         print(f"Model loaded from {filepath}")
     
+    def freeze(self):
+        """
+        Make the loaded weights and scaler read-only before forking workers.
+        
+        Only the NumPy backend can be shared this way; the TensorFlow
+        runtime does not survive fork().
+        """
+        if not isinstance(self.model, numpy_lstm.NumpyLSTMModel):
+            raise Exception("Only the NumPy backend can be frozen, export the model with export_numpy() first")
+        self.model.freeze()
+        self.scaler.freeze()
+    
     def classify_precip_type(self, temp: float, precip_amount: float) -> str:
-        if precip_amount < 0.1:
+        if precip_amount < DRY_BELOW_MM:
             return 'none'
-        elif temp < -2:
-            return 'snow'
-        elif temp < 2:
-            return 'mixed'
-        else:
-            return 'rain'
+        bounds, labels = PRECIP_TYPES
+        return labels[bisect.bisect_right(bounds, temp)]
     
     def classify_intensity(self, precip_amount: float, precip_type: str) -> str:
-        if precip_amount < 0.1:
+        if precip_amount < DRY_BELOW_MM:
             return 'none'
-        elif precip_type == 'snow':
-            if precip_amount < 1:
-                return 'light'
-            elif precip_amount < 5:
-                return 'moderate'
-            else:
-                return 'heavy'
-        else:
-            if precip_amount < 2.5:
-                return 'light'
-            elif precip_amount < 7.5:
-                return 'moderate'
-            else:
-                return 'heavy'
\ No newline at end of file
+        bounds, labels = INTENSITIES.get(precip_type, INTENSITIES['default'])
+        return labels[bisect.bisect_right(bounds, precip_amount)]
+
+    def classify_precip_types(self, temps, precip_amounts) -> np.ndarray:
+        """
+        Array version of classify_precip_type over whole columns.
+    
+        Args:
+            temps: Temperatures in °C, an array or one value for every row
+            precip_amounts: Precipitation in mm
+        
+        Returns:
+            Object array of labels, identical to classify_precip_type per row
+        """
+        amounts = np.asarray(precip_amounts, dtype=float)
+        temps = np.broadcast_to(np.asarray(temps, dtype=float), amounts.shape)
+        bounds, labels = PRECIP_TYPES
+        # side='right' matches the scalar `<` comparisons; NaN sorts last, like a failed comparison
+        types = np.array(labels, dtype=object)[np.searchsorted(bounds, temps, side='right')]
+        types[amounts < DRY_BELOW_MM] = 'none'
+        return types
+
+    def classify_intensities(self, precip_amounts, precip_types) -> np.ndarray:
+        """Array version of classify_intensity; identical to it per row."""
+        amounts = np.asarray(precip_amounts, dtype=float)
+        precip_types = np.asarray(precip_types, dtype=object)
+        bounds, labels = INTENSITIES['default']
+        intensities = np.array(labels, dtype=object)[np.searchsorted(bounds, amounts, side='right')]
+        for precip_type, (bounds, labels) in INTENSITIES.items():
+            rows = precip_types == precip_type
+            if precip_type != 'default' and rows.any():
+                intensities[rows] = np.array(labels, dtype=object)[np.searchsorted(bounds, amounts[rows], side='right')]
+        intensities[amounts < DRY_BELOW_MM] = 'none'
+        return intensities
@@ -0,0 +1,138 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Hashable, Optional
+
+import pandas as pd
+
+
+# How long an expired entry can still be revalidated against fresh observations
+REVALIDATE_SECONDS = 24 * 3600
+
+
+class ForecastEntry:
+    """Per-hour forecast for one grid cell, issued at one observation hour."""
+
+    def __init__(self, forecast: pd.DataFrame, temperature: float,
+                 covers_until: datetime, issue_hour: datetime, expires_at: float):
+        self.forecast = forecast
+        self.temperature = temperature
+        self.covers_until = covers_until
+        self.issue_hour = issue_hour
+        self.expires_at = expires_at
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.forecast.memory_usage(index=True, deep=True).sum())
+
+
+class ForecastCache:
+    """
+    Bounded in-process cache of per-hour forecasts.
+
+    Keyed by (grid cell, model version). Each entry records its issue
+    hour, the last observation hour the forecast was computed from. New
+    observations can only arrive on a later wall-clock hour, so entries
+    are fresh until the next UTC hour. After that a request refetches its
+    inputs, and if the last observation hour has not moved, revalidate()
+    keeps the forecast with the new current conditions instead of running
+    the model again. The least recently used entry is evicted once
+    max_entries is reached. A request is a hit when the cached forecast
+    reaches at least as far as the request does; callers slice the
+    sub-window they need. Forecasts only cover the hours requested so far,
+    and a request reaching further extends the revalidated entry by the
+    missing hours (see extend()).
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.extended = 0
+        self._entries: 'OrderedDict[Hashable, ForecastEntry]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def current_hour(now: Optional[datetime] = None) -> datetime:
+        """Current UTC hour, naive like the observation index."""
+        now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+        return now.replace(minute=0, second=0, microsecond=0)
+
+    @staticmethod
+    def issue_hour(observations: pd.DataFrame) -> datetime:
+        """Issue hour of a forecast computed from these observations: the last observed hour."""
+        return observations.index[-1].to_pydatetime().replace(minute=0, second=0, microsecond=0)
+
+    def get(self, key: Hashable, until: datetime) -> Optional[ForecastEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= time.time() or entry.covers_until < until:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def revalidate(self, key: Hashable, issue_hour: datetime, temperature: float) -> Optional[ForecastEntry]:
+        """
+        Renew an entry issued from the same observation hour.
+
+        Returns:
+            The entry with fresh current conditions and expiry (it may not reach
+            as far as the caller needs, see extend()), or None if the forecast
+            must be recomputed
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.issue_hour != issue_hour:
+                return None
+            entry = ForecastEntry(entry.forecast, temperature, entry.covers_until, issue_hour, self._next_hour())
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self.revalidated += 1
+            return entry
+
+    @staticmethod
+    def _next_hour() -> float:
+        """time.time() at the start of the next UTC hour."""
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        next_hour = ForecastCache.current_hour(now) + timedelta(hours=1)
+        return time.time() + (next_hour - now).total_seconds()
+
+    def put(self, key: Hashable, forecast: pd.DataFrame, temperature: float,
+            covers_until: datetime, issue_hour: datetime) -> ForecastEntry:
+        """Store a forecast issued from the observation hour issue_hour until the next UTC hour."""
+        entry = ForecastEntry(forecast, temperature, covers_until, issue_hour, self._next_hour())
+
+        with self._lock:
+            now = time.time()
+            for stale in [k for k, e in self._entries.items() if e.expires_at + REVALIDATE_SECONDS <= now]:
+                del self._entries[stale]
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def extend(self, key: Hashable, entry: ForecastEntry, forecast: pd.DataFrame) -> ForecastEntry:
+        """Store `entry` extended by the forecast for the hours after it."""
+        with self._lock:
+            self.extended += 1
+        return self.put(key, pd.concat([entry.forecast, forecast]), entry.temperature,
+                        forecast.index[-1].to_pydatetime(), entry.issue_hour)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / total if total else 0.0,
+                'revalidated': self.revalidated,
+                'extended': self.extended,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'memory_bytes': sum(entry.nbytes for entry in self._entries.values())
+            }
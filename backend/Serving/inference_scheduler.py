@@ -0,0 +1,165 @@
+import asyncio
+import queue
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from Prediction_Modeller.prec_modeler import PrecipitationModel
+from Serving.metrics import Histogram, get_metrics
+
+DEFAULT_BATCH_FORECASTS = 4  # Longest forecasts one flush may combine
+LONGEST_FORECAST_WINDOWS = 240  # Windows in a forecast at the longest lead (168 h) plus one 72 h window
+DEFAULT_MAX_BATCH_WINDOWS = DEFAULT_BATCH_FORECASTS * LONGEST_FORECAST_WINDOWS  # Windows per flush (each is run n_samples times)
+DEFAULT_MAX_WAIT_MS = 5.0  # How long the first queued window waits for company
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+QUEUE_DEPTH_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64)
+
+
+class _Request:
+    def __init__(self, windows: np.ndarray, n_samples: int,
+                 loop: asyncio.AbstractEventLoop, future: asyncio.Future):
+        self.windows = windows
+        self.n_samples = n_samples
+        self.loop = loop
+        self.future = future
+
+
+def _resolve(future: asyncio.Future, result=None, error: Optional[BaseException] = None):
+    if future.done():
+        # The caller went away
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class InferenceScheduler:
+    """
+    Dynamic micro-batching in front of PrecipitationModel.mc_samples.
+
+    Coroutines submit their sequence windows and await the MC samples. A
+    dedicated worker thread takes the first queued request, keeps
+    collecting until max_batch_windows windows are queued or max_wait_ms
+    has passed, and runs them as one forward pass. Samples are scattered
+    back to each caller's event loop. Inference therefore never blocks the
+    event loop, and concurrent requests share forward passes.
+    """
+
+    def __init__(self, model: PrecipitationModel, max_batch_windows: int = DEFAULT_MAX_BATCH_WINDOWS,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS):
+        self.model = model
+        self.max_batch_windows = max_batch_windows
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.requests = 0
+        self.batch_windows = Histogram(BATCH_SIZE_BUCKETS)
+        self.batch_requests = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_depth = Histogram(QUEUE_DEPTH_BUCKETS)
+        self._queue: 'queue.Queue[Optional[_Request]]' = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='inference-scheduler', daemon=True)
+                self._thread.start()
+
+    def close(self, timeout: Optional[float] = None):
+        """Finish queued requests, then stop the worker."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    async def mc_samples(self, windows: np.ndarray, n_samples: int = 50) -> np.ndarray:
+        """
+        Queue windows for batched MC Dropout inference.
+
+        Args:
+            windows: Scaled sequences of shape (batch, sequence_length, features)
+            n_samples: Number of stochastic passes per sequence
+
+        Returns:
+            np.ndarray of shape (batch, n_samples), as PrecipitationModel.mc_samples
+        """
+        self.start()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        # Queueing plus the shared forward pass, as seen by the caller
+        with get_metrics().timer('inference_wait'):
+            self._queue.put(_Request(np.asarray(windows, dtype=np.float32), n_samples, loop, future))
+            return await future
+
+    async def predict_windows(self, batches: List[Tuple[np.ndarray, pd.DatetimeIndex]],
+                              n_samples: int = 50, quantiles=None) -> List[pd.DataFrame]:
+        """Scheduled equivalent of PrecipitationModel.predict_windows."""
+        if not self.model.is_trained:
+            raise ValueError("Model not trained")
+        samples = await self.mc_samples(np.concatenate([windows for windows, _ in batches]), n_samples)
+        return self.model.summarize_samples(batches, samples, quantiles)
+
+    def _run(self):
+        carry = None
+        while True:
+            first = carry if carry is not None else self._queue.get()
+            carry = None
+            if first is None:
+                return
+
+            batch = [first]
+            size = len(first.windows)
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch_windows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                # A stop marker or a request that does not fit starts the next batch
+                if (request is None or request.n_samples != first.n_samples
+                        or size + len(request.windows) > self.max_batch_windows):
+                    carry = request
+                    break
+                batch.append(request)
+                size += len(request.windows)
+
+            self.queue_depth.observe(self._queue.qsize())
+            self._flush(batch, size)
+
+    def _flush(self, batch: List[_Request], size: int):
+        self.batches += 1
+        self.requests += len(batch)
+        self.batch_windows.observe(size)
+        self.batch_requests.observe(len(batch))
+        try:
+            samples = self.model.mc_samples(np.concatenate([r.windows for r in batch]), batch[0].n_samples)
+        except Exception as e:
+            for r in batch:
+                r.loop.call_soon_threadsafe(_resolve, r.future, None, e)
+            return
+
+        offset = 0
+        for r in batch:
+            result = samples[offset:offset + len(r.windows)]
+            offset += len(r.windows)
+            r.loop.call_soon_threadsafe(_resolve, r.future, result)
+
+    def stats(self) -> Dict:
+        return {
+            'queue_depth': self._queue.qsize(),
+            'batches': self.batches,
+            'requests': self.requests,
+            'requests_per_batch': self.requests / self.batches if self.batches else 0.0,
+            'max_batch_windows': self.max_batch_windows,
+            'max_wait_ms': self.max_wait * 1000,
+            'batch_windows_histogram': self.batch_windows.snapshot(),
+            'batch_requests_histogram': self.batch_requests.snapshot(),
+            'queue_depth_histogram': self.queue_depth.snapshot()
+        }
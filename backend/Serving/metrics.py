@@ -0,0 +1,193 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Seconds; spans a cache hit (sub-millisecond) through a slow upstream (tens of seconds)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGE_METRIC = 'weather_stage_duration_seconds'
+STAGE_ERRORS_METRIC = 'weather_stage_errors_total'
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative bucket counts, Prometheus style (each bucket counts values <= its bound)."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+            else:
+                self.counts[-1] += 1
+            self.total += value
+            self.count += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counts, total, count = list(self.counts), self.total, self.count
+        cumulative = np.cumsum(counts).tolist()
+        labels = [str(bound) for bound in self.buckets] + ['+Inf']
+        return {
+            'buckets': dict(zip(labels, cumulative)),
+            'count': count,
+            'sum': total,
+            'mean': total / count if count else 0.0
+        }
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+class Metrics:
+    """
+    Process-wide timers, counters and gauges, exported in the Prometheus text format.
+
+    Hot paths only touch a lock and a few integers per observation. Every
+    stage timer feeds one labelled histogram (weather_stage_duration_seconds
+    {stage="..."}), so a slow request can be attributed to the upstream
+    fetch, feature engineering or the model from a single metric.
+
+    Each process keeps its own registry: with Serving.prefork every worker
+    reports only the requests it served.
+    """
+
+    def __init__(self):
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+        self._help: Dict[str, str] = {
+            STAGE_METRIC: 'Time spent in each request stage',
+            STAGE_ERRORS_METRIC: 'Stage executions that raised',
+        }
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, buckets: Sequence[float] = LATENCY_BUCKETS, help: str = '',
+                  **labels) -> Histogram:
+        """Histogram for a name and label set, created on first use."""
+        key = (name, _labels(labels))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(buckets))
+                if help:
+                    self._help.setdefault(name, help)
+        return histogram
+
+    def register_histogram(self, name: str, histogram: Histogram, help: str = '', **labels):
+        """Export a histogram owned by another component (e.g. the inference scheduler)."""
+        with self._lock:
+            self._histograms[(name, _labels(labels))] = histogram
+            if help:
+                self._help[name] = help
+
+    def register_gauge(self, name: str, fn: Callable[[], float], help: str = ''):
+        """Export a value read at scrape time."""
+        with self._lock:
+            self._gauges[name] = fn
+            if help:
+                self._help[name] = help
+
+    def count(self, name: str, amount: float = 1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, stage: str, seconds: float):
+        self.histogram(STAGE_METRIC, stage=stage).observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """Time a block into the stage histogram; exceptions are counted and re-raised."""
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.count(STAGE_ERRORS_METRIC, stage=stage)
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def stages(self) -> Dict[str, Dict]:
+        """Snapshot of every stage histogram, keyed by stage name."""
+        return {
+            dict(labels)['stage']: histogram.snapshot()
+            for (name, labels), histogram in list(self._histograms.items())
+            if name == STAGE_METRIC
+        }
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+            counters = sorted(self._counters.items(), key=lambda item: item[0])
+            gauges = sorted(self._gauges.items())
+            help_text = dict(self._help)
+
+        lines: List[str] = []
+        declared = set()
+
+        def declare(name: str, kind: str):
+            if name in declared:
+                return
+            declared.add(name)
+            if name in help_text:
+                lines.append(f'# HELP {name} {help_text[name]}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        for (name, labels), histogram in histograms:
+            declare(name, 'histogram')
+            snapshot = histogram.snapshot()
+            for bound, cumulative in snapshot['buckets'].items():
+                lines.append(f'{name}_bucket{_format_labels(labels, ("le", bound))} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(snapshot["sum"])}')
+            lines.append(f'{name}_count{_format_labels(labels)} {snapshot["count"]}')
+
+        for (name, labels), value in counters:
+            declare(name, 'counter')
+            lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+
+        for name, fn in gauges:
+            try:
+                value = fn()
+            except Exception:
+                continue
+            declare(name, 'gauge')
+            lines.append(f'{name} {_format_value(value)}')
+
+        return '\n'.join(lines) + '\n'
+
+
+_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """Metrics registry shared by the whole process."""
+    return _metrics
@@ -0,0 +1,102 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from Prediction_Modeller.prec_modeler import PrecipitationModel
+
+# Forecast windows per request we warm up for: a full /predict window and the longest rollout
+WARMUP_WINDOWS = (72, 240)
+
+# Lifecycle states, in order
+STARTING = 'starting'
+LOADING = 'loading'
+WARMING = 'warming'
+READY = 'ready'
+FAILED = 'failed'
+
+logger = logging.getLogger(__name__)
+
+
+class ModelManager:
+    """
+    Load a PrecipitationModel in the background and warm it up before serving.
+
+    start() returns immediately; a daemon thread loads the weights and runs
+    synthetic Monte Carlo passes for the batch shapes /predict produces, so
+    kernels and allocations are in place before the first real request.
+    The process is live as soon as it runs, and ready only once warm-up
+    has finished. A failed load shows up in readiness only: restarting
+    the process would fail the same way.
+    """
+
+    def __init__(self, model: PrecipitationModel, filepath: str, backend: str = 'auto',
+                 n_samples: int = 50, warmup_windows: Tuple[int, ...] = WARMUP_WINDOWS):
+        self.model = model
+        self.filepath = filepath
+        self.backend = backend
+        self.n_samples = n_samples
+        self.warmup_windows = warmup_windows
+        self.state = STARTING
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self._started_at = time.time()
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    def start(self):
+        # Nothing to do when the model was already loaded, e.g. by a pre-fork parent
+        if self._thread is None and self.state == STARTING:
+            self._thread = threading.Thread(target=self.load, name='model-loader', daemon=True)
+            self._thread.start()
+
+    def load(self):
+        """Load and warm up the model on the calling thread."""
+        try:
+            self.state = LOADING
+            started = time.perf_counter()
+            self.model.load(self.filepath, backend=self.backend)
+            self.load_seconds = time.perf_counter() - started
+            logger.info("Model loaded in %.2fs", self.load_seconds)
+
+            self.state = WARMING
+            started = time.perf_counter()
+            self.warmup()
+            self.warmup_seconds = time.perf_counter() - started
+            logger.info("Model warmed up in %.2fs", self.warmup_seconds)
+
+            self.state = READY
+            self._ready.set()
+        except Exception as e:
+            self.state = FAILED
+            self.error = str(e)
+            logger.exception("Model load failed: %s", e)
+
+    def warmup(self):
+        """Run one synthetic forward pass per served batch shape."""
+        n_features = len(self.model.feature_names)
+        for windows in self.warmup_windows:
+            X = np.zeros((windows, self.model.sequence_length, n_features), dtype=np.float32)
+            self.model.mc_samples(X, self.n_samples)
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the model is ready; returns False on timeout."""
+        return self._ready.wait(timeout)
+
+    def status(self) -> Dict:
+        return {
+            'state': self.state,
+            'ready': self.ready,
+            'error': self.error,
+            'model_version': self.model.version,
+            'uptime_seconds': round(time.time() - self._started_at, 1),
+            'load_seconds': self.load_seconds,
+            'warmup_seconds': self.warmup_seconds
+        }
@@ -0,0 +1,145 @@
+"""
+Pre-fork serving: load once, fork many.
+
+    python -m Serving.prefork --workers 4 --port 8000
+
+The parent process loads and warms up the model from its NumPy export,
+builds the climatology index, marks every array read-only and freezes the
+garbage collector, then forks the workers. Workers share those pages
+copy-on-write instead of each loading its own copy, and the parent
+restarts any worker that exits.
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict
+
+# Allow running as a script from the backend directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uvicorn
+
+from Data_Collector.climatology import get_index
+
+RESTART_DELAY_SECONDS = 1.0  # Pause before replacing a worker that exited
+
+logger = logging.getLogger(__name__)
+
+
+def _listen(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def preload(climatology_dir: str = 'historical_data'):
+    """
+    Load everything workers only read, in the parent process.
+
+    Returns:
+        The main module, with its model loaded, warmed up and frozen
+    """
+    import main
+
+    # TensorFlow does not survive fork(), so the parent serves the NumPy export
+    main.model_manager.backend = 'numpy'
+    main.model_manager.load()
+    if not main.model_manager.ready:
+        raise Exception(f"Model failed to load: {main.model_manager.error}")
+    main.model.freeze()
+
+    get_index(climatology_dir).freeze()
+
+    # Keep the collector from writing to (and so copying) every preloaded object
+    gc.collect()
+    gc.freeze()
+    return main
+
+
+def _run_worker(app, sock: socket.socket, log_level: str):
+    # Workers should not inherit the parent's handlers
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    config = uvicorn.Config(app, log_level=log_level, lifespan='on')
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve(host: str = '0.0.0.0', port: int = 8000, workers: int = os.cpu_count() or 1,
+          log_level: str = 'info'):
+    """
+    Preload the app, then fork and supervise `workers` uvicorn processes.
+
+    Args:
+        host, port: Address all workers accept connections on
+        workers: Number of worker processes
+        log_level: uvicorn log level
+    """
+    if not hasattr(os, 'fork'):
+        raise Exception("Pre-fork serving needs os.fork(); use uvicorn --workers on this platform")
+
+    main = preload()
+    sock = _listen(host, port)
+    children: Dict[int, int] = {}  # pid -> worker slot
+    stopping = False
+
+    def spawn(slot: int):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                # Every worker inherits the parent's generator state; without a new seed they draw identical dropout masks
+                main.model.model.reseed((os.getpid(), time.time_ns()))
+                _run_worker(main.app, sock, log_level)
+            finally:
+                os._exit(0)
+        children[pid] = slot
+        logger.info("Worker %d started (pid %d)", slot, pid)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for slot in range(workers):
+        spawn(slot)
+
+    logger.info("Serving on %s:%d with %d workers (parent pid %d)", host, port, workers, os.getpid())
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        slot = children.pop(pid, None)
+        if slot is None or stopping:
+            continue
+        logger.warning("Worker %d (pid %d) exited with status %d, restarting", slot, pid, status)
+        time.sleep(RESTART_DELAY_SECONDS)
+        spawn(slot)
+
+    sock.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve the API from pre-forked workers sharing one model copy')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--log-level', default='info')
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, args.log_level)
@@ -0,0 +1,98 @@
+import json
+import re
+from itertools import repeat
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Optional: responses fall back to the standard library encoder
+    orjson = None
+
+# orjson only writes a number differently from json.dumps when it uses an exponent
+# (1e16, 6.9e-6) or more leading zeros (0.00002), and it writes NaN/inf as null where the
+# standard encoder raises. Output containing any of these is re-encoded the slow way.
+_EXPONENT = re.compile(rb'e[-+0-9]')
+_ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_SUBCLASS
+    if orjson is not None else 0
+)
+
+
+def encode_json(content: Any) -> bytes:
+    """
+    Encode a response body exactly as FastAPI's default JSON response would.
+
+    Plain dicts, lists, strings and numbers go through orjson when it is
+    installed, and the result is kept when it is byte-identical to the
+    standard encoder's (checked with one scan of the output). Anything
+    else, such as datetimes or numpy scalars, goes through jsonable_encoder
+    and json.dumps as before.
+    """
+    if orjson is not None:
+        try:
+            encoded = orjson.dumps(content, option=_ORJSON_OPTIONS)
+        except TypeError:
+            encoded = None
+        if encoded is not None and not (_EXPONENT.search(encoded) or b'0.0000' in encoded or b'null' in encoded):
+            return encoded
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, indent=None, separators=(',', ':')
+    ).encode('utf-8')
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with encode_json."""
+
+    def render(self, content: Any) -> bytes:
+        return encode_json(content)
+
+
+def isoformat(timestamps: pd.DatetimeIndex) -> List[str]:
+    """Timestamp.isoformat() of every timestamp, formatted in one pass when that gives the same strings."""
+    if timestamps.tz is None and not (timestamps.microsecond.any() or timestamps.nanosecond.any()):
+        return timestamps.strftime('%Y-%m-%dT%H:%M:%S').tolist()
+    return [ts.isoformat() for ts in timestamps]
+
+
+def rounded(values, ndigits: int) -> List[float]:
+    """round(float(v), ndigits) for every value (numpy rounds differently for some halves)."""
+    return [round(v, ndigits) for v in np.asarray(values, dtype=float).tolist()]
+
+
+def rounded_or_none(values, ndigits: int) -> List[Optional[float]]:
+    """rounded(), with None (null in JSON) for missing NaN values."""
+    return [None if v != v else round(v, ndigits) for v in np.asarray(values, dtype=float).tolist()]
+
+
+def column_records(columns: Dict[str, Any], length: int) -> List[Dict]:
+    """
+    Row dicts built from whole columns.
+
+    Args:
+        columns: Arrays, Series or lists of `length` values (numpy values become
+                 Python scalars), or a single value repeated on every row
+        length: Number of rows
+
+    Returns:
+        [{name: value, ...}, ...] with keys in column order
+    """
+    values = []
+    for column in columns.values():
+        if isinstance(column, (np.ndarray, pd.Series, pd.Index)):
+            values.append(column.tolist())
+        elif isinstance(column, list):
+            values.append(column)
+        else:
+            values.append(repeat(column, length))
+    keys = list(columns)
+    return [dict(zip(keys, row)) for row in zip(*values)]
+
+
+def frame_records(df: pd.DataFrame) -> List[Dict]:
+    """df.to_dict('records') without the per-row pandas overhead."""
+    return column_records({name: df[name] for name in df.columns}, len(df))
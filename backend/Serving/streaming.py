@@ -0,0 +1,70 @@
+import json
+import logging
+import math
+from typing import Any, AsyncIterator, Dict
+
+import numpy as np
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+# Supported ?stream= values and their content types
+STREAM_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'sse': 'text/event-stream',
+}
+
+logger = logging.getLogger(__name__)
+
+
+def _finite(value: Any) -> Any:
+    """The value with NaN and infinities (also inside dicts and lists) replaced by None."""
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    if isinstance(value, (float, np.floating)):
+        return float(value) if math.isfinite(value) else None
+    return value
+
+
+def encode_record(record: Dict, fmt: str) -> str:
+    """One record as an NDJSON line, or as an SSE event named after its "event" key (strict JSON, NaN as null)."""
+    data = json.dumps(_finite(record), default=float, allow_nan=False)
+    if fmt == 'sse':
+        return f"event: {record.get('event', 'message')}\ndata: {data}\n\n"
+    return data + "\n"
+
+
+def check_stream_format(fmt: str):
+    if fmt not in STREAM_FORMATS:
+        raise HTTPException(status_code=422, detail=f"stream must be one of {sorted(STREAM_FORMATS)}")
+
+
+async def _encoded(records: AsyncIterator[Dict], fmt: str) -> AsyncIterator[str]:
+    try:
+        async for record in records:
+            yield encode_record(record, fmt)
+    except Exception as e:
+        # Headers are already sent, so report the failure as the last record
+        status_code = e.status_code if isinstance(e, HTTPException) else 500
+        detail = e.detail if isinstance(e, HTTPException) else str(e)
+        logger.error("Error while streaming: %s", detail)
+        yield encode_record({"event": "error", "status_code": status_code, "error": detail}, fmt)
+
+
+def stream_records(records: AsyncIterator[Dict], fmt: str) -> StreamingResponse:
+    """
+    Send records to the client as soon as they are produced.
+
+    Args:
+        records: Async generator of JSON-serialisable dicts, each with an "event" key
+        fmt: 'ndjson' (one JSON object per line) or 'sse' (Server-Sent Events)
+    """
+    check_stream_format(fmt)
+    return StreamingResponse(
+        _encoded(records, fmt),
+        media_type=STREAM_FORMATS[fmt],
+        # Keep proxies from buffering the stream
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
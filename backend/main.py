@@ -1,13 +1,41 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import logging
+import os
+import time
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from datetime import datetime, timezone, timedelta
-from typing import Optional
-import requests
+from typing import List, Optional
 from Prediction_Modeller.prec_modeler import PrecipitationModel
 from Data_Collector.data_fetcher import DataFetcher
+from Data_Collector.http_client import get_async_client
+from Data_Collector.power_cache import get_default_cache, snap_to_grid
+from Data_Collector.provider_formats import get_default_formats
+from Data_Collector.provider_health import get_provider_health, hedged
 from Data_Collector.data_rod_fetcher import fetch_datarods_historical_average
 from Data_Collector.giovanni_fetcher import fetch_giovanni_historical_average
+from Data_Collector.climatology import POWER_FILL_VALUE, window_mean
+from Data_Collector.historical_fetcher import fetch_power_window, require_power_window
+from Data_Collector.observation_context import ObservationContext
+from Serving.forecast_cache import ForecastCache
+from Serving.single_flight import SingleFlight
+from Serving.model_lifecycle import ModelManager
+from Serving.inference_scheduler import InferenceScheduler
+from Serving.streaming import check_stream_format, stream_records
+from Serving.metrics import get_metrics
+from Serving.responses import FastJSONResponse, column_records, frame_records, isoformat, rounded, rounded_or_none
+
+# Per-request tracing is logged at DEBUG, so it costs nothing at the default level
+logging.basicConfig(
+    level=os.environ.get('LOG_LEVEL', 'WARNING').upper(),
+    format='%(asctime)s %(levelname)s %(name)s: %(message)s'
+)
+logger = logging.getLogger(__name__)
+
 app = FastAPI()
 
 app.add_middleware(
@@ -18,50 +46,95 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Load trained model
+MAX_FORECAST_HOURS = 72  # Longest window /predict serves
+MAX_LEAD_HOURS = 168  # Cap on hours between last observation and target_time
+INFERENCE_BATCH_FORECASTS = int(os.environ.get('INFERENCE_BATCH_FORECASTS', 4))  # Longest forecasts one forward pass may combine
+MC_SAMPLES = int(os.environ.get('MC_SAMPLES', 50))  # Monte Carlo Dropout passes per forecast hour
+HISTORICAL_YEARS = 5  # Past years averaged into the baseline
+MAX_BATCH_ITEMS = 100  # Most locations one /predict/batch call may request
+MAX_BATCH_WINDOWS = int(os.environ.get('MAX_BATCH_WINDOWS', 2400))  # Most forecast windows one /predict/batch call may roll out
+RECENT_DAYS = 2  # Days of recent observations the forecast rolls forward from
+CURRENT_WEATHER_URL = os.environ.get('CURRENT_WEATHER_URL', 'http://localhost:3001/api/current-weather')
+CURRENT_WEATHER_BUDGET = float(os.environ.get('CURRENT_WEATHER_BUDGET', 5))  # Longest wait for the Node service
+# Seconds before yesterday's NASA observations are used in parallel with the Node call; negative (the default)
+# disables the hedge, so they only stand in once the Node call fails, times out or its circuit is open.
+# A hedged answer is a day old and is cached with the forecast, so only enable this if staleness is acceptable.
+CURRENT_WEATHER_HEDGE_SECONDS = float(os.environ.get('CURRENT_WEATHER_HEDGE_SECONDS', -1))
+
+predict_flights = SingleFlight()
+forecast_cache = ForecastCache()
+
+# Trained model, loaded and warmed up in the background on startup
 model = PrecipitationModel()
-try:
-    model.load('trained_precipitation_model.pkl')
-    print("✓ Model loaded successfully")
-except Exception as e:
-    print(f"⚠ Model load failed: {e}")
-def fetch_nasa_data(lat: float, lon: float, start_date: str, end_date: str):
-    """Helper to fetch NASA data - reuse your DataFetcher logic."""
-    fetcher = DataFetcher()
-    df = fetcher.fetch_data(lat, lon, start_date, end_date)
+# 'numpy' serves from the exported weights without importing TensorFlow
+model_manager = ModelManager(
+    model,
+    'trained_precipitation_model.pkl',
+    backend=os.environ.get('MODEL_BACKEND', 'auto'),
+    n_samples=MC_SAMPLES,
+    # A full /predict window and the longest rollout forecast_windows produces (the longest lead plus one window)
+    warmup_windows=(MAX_FORECAST_HOURS, MAX_LEAD_HOURS + MAX_FORECAST_HOURS)
+)
+# Concurrent forecasts share batched forward passes on a worker thread
+inference_scheduler = InferenceScheduler(
+    model,
+    # A forecast rolls out up to MAX_LEAD_HOURS + MAX_FORECAST_HOURS windows, so size flushes in whole forecasts
+    max_batch_windows=int(os.environ.get('INFERENCE_MAX_BATCH_WINDOWS',
+                                         INFERENCE_BATCH_FORECASTS * (MAX_FORECAST_HOURS + MAX_LEAD_HOURS))),
+    max_wait_ms=float(os.environ.get('INFERENCE_MAX_WAIT_MS', 5))
+)
+
+metrics = get_metrics()
+metrics.register_histogram('weather_inference_batch_windows', inference_scheduler.batch_windows,
+                           help='Windows per batched forward pass')
+metrics.register_histogram('weather_inference_batch_requests', inference_scheduler.batch_requests,
+                           help='Requests sharing one batched forward pass')
+metrics.register_gauge('weather_inference_queue_depth', lambda: inference_scheduler.stats()['queue_depth'],
+                       help='Requests waiting for the inference worker')
+metrics.register_gauge('weather_model_ready', lambda: float(model_manager.ready),
+                       help='1 once the model is loaded and warmed up')
+metrics.register_gauge('weather_forecast_cache_hit_ratio', lambda: forecast_cache.stats()['hit_ratio'],
+                       help='Forecast cache hits over lookups')
+metrics.register_gauge('weather_provider_open_circuits', lambda: get_provider_health().open_circuits(),
+                       help='Upstream providers whose circuit is open or half-open')
+
+async def fetch_nasa_data(lat: float, lon: float, start_date: str, end_date: str,
+                          context: Optional[ObservationContext] = None):
+    """Hourly PRECTOTCORR/T2M records for a date range, read from the request's observation context."""
+    context = context or ObservationContext(lat, lon)
+    df = await context.frame(start_date, end_date)
     if df is None:
         return []
     # Convert dataframe to list of dicts with hourly data
-    return [{"PRECTOTCORR": row['PRECTOTCORR'], "T2M": row.get('T2M', 0)} 
-            for _, row in df.iterrows()]
+    temperature = df['T2M'] if 'T2M' in df.columns else 0
+    return column_records({"PRECTOTCORR": df['PRECTOTCORR'], "T2M": temperature}, len(df))
 
-def get_historical_average(lat: float, lon: float, target_dt: datetime, hours: int) -> list:
-    """Get 5-year average precipitation for the same date/time."""
-    month = target_dt.month
-    day = target_dt.day
-    
-    all_precip_data = []
+def historical_start(target_dt: datetime) -> datetime:
+    return target_dt.replace(tzinfo=None, minute=0, second=0, microsecond=0)
+
+def observation_context(lat: float, lon: float, target_dt: datetime, hours: int) -> ObservationContext:
+    """
+    POWER observations for one forecast request.
     
-    for year_offset in range(1, 3):
-        past_year = target_dt.year - year_offset
-        date_str = f"{past_year}{month:02d}{day:02d}"
-        
-        print(f"  Fetching historical: {date_str}")
-        data = fetch_nasa_data(lat, lon, date_str, date_str)
-        
-        if data:
-            precip_values = [d.get('PRECTOTCORR', 0) for d in data if d.get('PRECTOTCORR', -999) != -999]
-            if precip_values:
-                all_precip_data.append(precip_values)
-    
-    # Calculate hourly averages
-    hourly_averages = []
-    for hour_idx in range(min(hours, 24)):
-        values = [year[hour_idx] for year in all_precip_data if len(year) > hour_idx]
-        hourly_averages.append(sum(values) / len(values) if values else 0)
-    
-    print(f"  ✓ Got {len(hourly_averages)} hourly averages from {len(all_precip_data)} years")
-    return hourly_averages
+    The historical-average windows, and any requested hours already
+    observed, are declared up front, so they are fetched in the same round
+    as the recent window the forecast needs.
+    """
+    context = ObservationContext(lat, lon)
+    start = historical_start(target_dt)
+    require_power_window(context, start, hours, HISTORICAL_YEARS)
+    now = ForecastCache.current_hour()
+    if start < now:
+        context.require(start, min(start + timedelta(hours=hours - 1), now))
+    return context
+
+async def get_historical_average(lat: float, lon: float, target_dt: datetime, hours: int,
+                                 context: Optional[ObservationContext] = None) -> list:
+    """Get multi-year average precipitation for the same date/time window."""
+    with metrics.timer('historical_average'):
+        history = await fetch_power_window(lat, lon, historical_start(target_dt), hours,
+                                           years_back=HISTORICAL_YEARS, context=context)
+        return window_mean(history).tolist()
 class PredictionRequest(BaseModel):
     latitude: float
     longitude: float
@@ -69,179 +142,660 @@ class PredictionRequest(BaseModel):
     end_time: Optional[str] = None  # Optional end time
     hours_ahead: Optional[int] = 24  # Default if no end_time
 
+class BatchPredictionRequest(BaseModel):
+    items: List[PredictionRequest]
+
+@app.on_event("startup")
+async def start_model_manager():
+    model_manager.start()
+    inference_scheduler.start()
+
+@app.on_event("shutdown")
+async def close_http_client():
+    await get_async_client().aclose()
+    inference_scheduler.close(timeout=5)
+
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template so per-location paths do not explode the label set
+    route = request.scope.get('route')
+    path = getattr(route, 'path', 'unmatched')
+    metrics.histogram('weather_http_request_duration_seconds', path=path,
+                      help='Time to the response head per route').observe(time.perf_counter() - started)
+    metrics.count('weather_http_requests_total', path=path, status=response.status_code)
+    return response
+
+def respond(body):
+    """JSON response for a result dict, with the encoding timed as the serialization stage."""
+    with metrics.timer('serialization'):
+        return FastJSONResponse(body)
+
 @app.get("/")
 def root():
     return {"message": "Weather Prediction API", "status": "running"}
 
+@app.get("/health/live")
+def liveness():
+    # Answering at all means the process is alive; a failed model load is reported by readiness
+    return model_manager.status()
+
+@app.get("/health/ready")
+def readiness():
+    status = model_manager.status()
+    return JSONResponse(status, status_code=200 if status['ready'] else 503)
+
+@app.get("/inference-stats")
+def inference_stats():
+    return inference_scheduler.stats()
+
+@app.get("/metrics")
+def metrics_endpoint():
+    """Stage timings, request latencies and scheduler histograms in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/provider-health")
+def provider_health():
+    """Circuit state, consecutive failures and last error of every upstream provider called so far."""
+    return get_provider_health().stats()
+
+@app.get("/cache-stats")
+def cache_stats():
+    return {
+        "forecast_cache": forecast_cache.stats(),
+        "power_cache": get_default_cache().stats(),
+        "predict_single_flight": predict_flights.stats(),
+        "provider_formats": get_default_formats().stats()
+    }
+
+def parse_request_window(req: PredictionRequest):
+    """Target start time, hours requested and days since the start time for a request."""
+    # Parse target_time from request
+    target_time = req.target_time
+    if target_time.endswith('Z'):
+        target_time = target_time.replace('Z', '+00:00')
+    target_dt = datetime.fromisoformat(target_time)
+    
+    now = datetime.now(timezone.utc)
+    logger.debug("Parsed target_dt %s (now %s)", target_dt, now)
+    
+    # Calculate hours_ahead from end_time if provided
+    if req.end_time:
+        end_time = req.end_time
+        if end_time.endswith('Z'):
+            end_time = end_time.replace('Z', '+00:00')
+        end_dt = datetime.fromisoformat(end_time)
+        hours_ahead = int((end_dt - target_dt).total_seconds() / 3600)
+        hours_ahead = max(1, min(hours_ahead, 72))  # Limit to 1-72 hours
+        logger.debug("Calculated hours_ahead from end_time: %d", hours_ahead)
+    else:
+        hours_ahead = req.hours_ahead
+    days_difference = (now - target_dt.replace(tzinfo=timezone.utc)).days
+    return target_dt, hours_ahead, days_difference
+
 @app.post("/predict")
-async def predict_weather(req: PredictionRequest):
-    print(f"RECEIVED REQUEST: {req}")
+async def predict_weather(req: PredictionRequest, stream: Optional[str] = None):
+    """
+    Hourly predictions for a location and time window.
+    
+    With ?stream=ndjson or ?stream=sse the records are streamed as they
+    become ready instead of returned in one body (see stream_prediction).
+    """
+    logger.debug("Received request: %s", req)
     try:
-        # Parse target_time from request
-        target_time = req.target_time
-        if target_time.endswith('Z'):
-            target_time = target_time.replace('Z', '+00:00')
-        target_dt = datetime.fromisoformat(target_time)
-        print(f"Parsed target_dt: {target_dt}")
-        
-        now = datetime.now(timezone.utc)
-        print(f"Now: {now}, Is past? {target_dt.replace(tzinfo=timezone.utc) < now}")
-        
-        # Calculate hours_ahead from end_time if provided
-        if req.end_time:
-            end_time = req.end_time
-            if end_time.endswith('Z'):
-                end_time = end_time.replace('Z', '+00:00')
-            end_dt = datetime.fromisoformat(end_time)
-            hours_ahead = int((end_dt - target_dt).total_seconds() / 3600)
-            hours_ahead = max(1, min(hours_ahead, 72))  # Limit to 1-72 hours
-            print(f"Calculated hours_ahead from end_time: {hours_ahead}")
-        else:
-            hours_ahead = req.hours_ahead
-        days_difference = (now - target_dt.replace(tzinfo=timezone.utc)).days
+        target_dt, hours_ahead, days_difference = parse_request_window(req)
 
-        # Past date = historical lookup
-        if days_difference > 7:
-            return await get_historical(req.latitude, req.longitude, target_dt)
-        
-        # Future date = ML prediction
+        # Past date = historical lookup, future date = ML prediction
+        is_historical = days_difference > 7
+        if not is_historical:
+            if not model_manager.ready:
+                raise HTTPException(status_code=503, detail=f"Model not ready ({model_manager.state})")
+            hours_ahead = max(1, min(hours_ahead, MAX_FORECAST_HOURS))
+
+        if stream:
+            check_stream_format(stream)
+            records = stream_prediction(req.latitude, req.longitude, target_dt, hours_ahead, is_historical)
+            return stream_records(records, stream)
+
+        # Identical concurrent requests (same grid cell, hour and horizon) share one computation
+        if is_historical:
+            cell = snap_to_grid(req.latitude, req.longitude)
+            key = ('historical', cell, target_dt.replace(minute=0, second=0, microsecond=0).isoformat())
+            result = await predict_flights.do(key, lambda: get_historical(req.latitude, req.longitude, target_dt))
         else:
-            return await get_prediction(req.latitude, req.longitude, target_dt, hours_ahead)
+            result = await shared_prediction(req.latitude, req.longitude, target_dt, hours_ahead)
+        
+        return respond({**result, "location": {"latitude": req.latitude, "longitude": req.longitude}})
             
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"ERROR in predict_weather: {e}")
+        logger.exception("Error in predict_weather")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def stream_prediction(lat, lon, target_dt, hours, is_historical):
+    """
+    Records for a streamed /predict.
+    
+    Every record carries an "event" key. The historical baseline (the
+    five-year POWER average, fetched live) is sent as "baseline" records
+    as soon as it arrives. The model output follows as "prediction"
+    records, the same dicts /predict returns, from the forecast shared
+    with concurrent /predict calls for the same window (see
+    shared_prediction). A final "summary" record closes the stream.
+    """
+    started = time.perf_counter()
+    if is_historical:
+        result = await get_historical(lat, lon, target_dt)
+        records = result["predictions"]
+    else:
+        hours, _ = forecast_request(target_dt, hours)
+        # The shared forecast reads its baseline from this context if the stream starts it, so POWER is fetched once
+        context = observation_context(lat, lon, target_dt, hours)
+        prediction = asyncio.ensure_future(shared_prediction(lat, lon, target_dt, hours, context))
+        try:
+            historical_avgs = await get_historical_average(lat, lon, target_dt, hours, context)
+            for i, hist_avg in enumerate(historical_avgs):
+                yield {
+                    "event": "baseline",
+                    "timestamp": (target_dt.replace(tzinfo=None) + timedelta(hours=i)).isoformat(),
+                    "historical_avg_precip_mm": round(float(hist_avg), 2)
+                }
+            records = (await prediction)["predictions"]
+        finally:
+            # Stop waiting for the forecast if the baseline failed or the client went away
+            prediction.cancel()
+    
+    for record in records:
+        yield {"event": "prediction", **record}
+    yield {
+        "event": "summary",
+        "predictions": len(records),
+        "location": {"latitude": lat, "longitude": lon},
+        "elapsed_seconds": round(time.perf_counter() - started, 3)
+    }
+
 async def get_historical(lat, lon, target_dt):
     """Fetch actual historical weather data."""
     fetcher = DataFetcher()
     date_str = target_dt.strftime('%Y%m%d')
     
-    df = fetcher.fetch_data(lat, lon, date_str, date_str)
+    df = await fetcher.fetch_data_async(lat, lon, date_str, date_str)
     
     if df is None or len(df) == 0:
         raise HTTPException(status_code=404, detail="No historical data found")
     
-    results = []
-    for idx, row in df.iterrows():
-        precip_type = model.classify_precip_type(row.get('T2M', 5), row['PRECTOTCORR'])
-        intensity = model.classify_intensity(row['PRECTOTCORR'], precip_type)
-        
-        results.append({
-            "timestamp": idx.isoformat(),
-            "precipitation_mm": float(row['PRECTOTCORR']),
-            "type": precip_type,
-            "intensity": intensity,
-            "temperature_c": float(row.get('T2M', 0)),
-            "is_historical": True
-        })
+    precip = df['PRECTOTCORR'].to_numpy(dtype=float)
+    temps = df['T2M'].to_numpy(dtype=float) if 'T2M' in df.columns else None
+    precip_types = model.classify_precip_types(temps if temps is not None else 5, precip)
+    results = column_records({
+        "timestamp": isoformat(df.index),
+        "precipitation_mm": precip,
+        "type": precip_types,
+        "intensity": model.classify_intensities(precip, precip_types),
+        "temperature_c": temps if temps is not None else 0.0,
+        "is_historical": True
+    }, len(df))
     
     return {"predictions": results, "location": {"latitude": lat, "longitude": lon}}
 
-async def get_prediction(lat, lon, target_dt, hours):
-    """Make ML prediction for future weather."""
-    print(f"ENTERING get_prediction for {lat},{lon}")
+async def fetch_forecast_inputs(lat, lon, context=None):
+    """Fetch current conditions and the recent observations the model rolls forward from."""
+    context = context or ObservationContext(lat, lon)
+    today = datetime.now()
+    start, yesterday = today - timedelta(days=RECENT_DAYS), today - timedelta(days=1)
+    # The recent window (which contains yesterday, the fallback below) downloads while the Node service answers
+    context.require(start, today)
+    recent = asyncio.ensure_future(context.frame(start, today))
     
-    # Get current weather from Node service
-    try:
-        print("Calling Node service...")
-        response = requests.post(
-            'http://localhost:3001/api/current-weather',
+    async def post_current():
+        response = await get_async_client().post(
+            CURRENT_WEATHER_URL,
             json={"latitude": lat, "longitude": lon},
-            timeout=5
+            timeout=CURRENT_WEATHER_BUDGET
         )
+        # Only server errors count against the breaker; a 4xx is about this request
+        if response.status_code >= 500:
+            response.raise_for_status()
+        return response
+    
+    async def node_current():
+        # Get current weather from Node service
+        with metrics.timer('node_call'):
+            response = await get_provider_health().call('current_weather', post_current, budget=CURRENT_WEATHER_BUDGET)
+        # An error page is a failure, not current conditions
+        response.raise_for_status()
         current = response.json()
-        print(f"Node service response: {current}")
-    except Exception as e:
-        print(f"Node service failed: {e}")
-        # Fallback to NASA if Node service fails
-        fetcher = DataFetcher()
-        yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y%m%d')
-        df = fetcher.fetch_data(lat, lon, yesterday, yesterday)
+        logger.debug("Node service response: %s", current)
+        return current
+    
+    async def nasa_current():
+        # Fallback to NASA if Node service fails or is slow
+        df = await context.frame(yesterday, yesterday)
+        if df is not None:
+            df = df[(df != POWER_FILL_VALUE).all(axis=1)]
         if df is not None and len(df) > 0:
-            current = {
+            return {
                 "temperature": df['T2M'].iloc[-1],
                 "humidity": df['RH2M'].iloc[-1],
                 "wind_speed": df['WS10M'].iloc[-1],
                 "precipitation": 0
             }
-        else:
-            raise HTTPException(status_code=503, detail="Weather data unavailable")
+        raise HTTPException(status_code=503, detail="Weather data unavailable")
     
-    # Fetch recent data for feature engineering
-    print("Fetching recent NASA data...")
-    fetcher = DataFetcher()
-    start = (datetime.now() - timedelta(days=2)).strftime('%Y%m%d')
-    end = datetime.now().strftime('%Y%m%d')
-    df = fetcher.fetch_data(lat, lon, start, end)
-    print(f"Fetched {len(df) if df is not None else 0} rows")
+    try:
+        hedge_after = CURRENT_WEATHER_HEDGE_SECONDS if CURRENT_WEATHER_HEDGE_SECONDS >= 0 else None
+        current = await hedged('current_weather', node_current, nasa_current, hedge_after)
+        
+        # Recent data for feature engineering
+        df = await recent
+    finally:
+        recent.cancel()
+    if df is not None:
+        # POWER pads hours it has not published yet with fill values; the forecast starts after the last real one
+        observed = (df != POWER_FILL_VALUE).all(axis=1).to_numpy()
+        df = df.iloc[:len(observed) - int(np.argmax(observed[::-1]))] if observed.any() else df.iloc[:0]
+    logger.debug("Fetched %d recent rows", len(df) if df is not None else 0)
     
     if df is None or len(df) < 24:
         raise HTTPException(status_code=503, detail="Insufficient data for LSTM prediction (need 24+ hours)")
     
-    # Engineer features
-    print("Engineering features...")
-    df_eng = model.engineer_features(df)
-    print(f"Engineered features: {len(df_eng)} rows, {len(df_eng.columns)} columns")
+    return df, current.get('temperature', 10)
+
+def forecast_windows(df, until, entry=None):
+    """
+    Model input windows for the hours after the last observation through `until`.
     
-    if len(df_eng) < 24:
-        raise HTTPException(status_code=503, detail="Feature engineering produced insufficient data")
+    Hours a cached entry already covers are skipped. Returns None when there
+    is nothing left to forecast within MAX_LEAD_HOURS + MAX_FORECAST_HOURS.
+    """
+    last_obs = df.index[-1]
+    horizon = int((until - last_obs).total_seconds() // 3600)
+    horizon = max(1, min(horizon, MAX_LEAD_HOURS + MAX_FORECAST_HOURS))
+    first = len(entry.forecast) if entry is not None else 0
+    if first >= horizon:
+        return None
+    logger.debug("Forecasting hours %d-%d from last observation %s", first + 1, horizon, last_obs)
+    try:
+        return model.horizon_windows(df, horizon, first)
+    except ValueError as e:
+        raise HTTPException(status_code=503, detail=f"Feature engineering produced insufficient data: {e}")
+
+def forecast_request(target_dt, hours):
+    """Clamped hours and the last forecast hour a request needs."""
+    hours = max(1, min(hours, MAX_FORECAST_HOURS))
+    until = target_dt.replace(tzinfo=None) + timedelta(hours=hours - 1)
+    return hours, until
+
+def forecast_cache_key(lat, lon):
+    # Entries record the observation hour they were issued from (see ForecastCache)
+    return (snap_to_grid(lat, lon), model.version)
+
+def plan_forecast(key, df, temperature, until):
+    """
+    What is left to compute for a forecast through `until` from fresh inputs.
     
-    # LSTM needs sequence of data
-    X_latest = df_eng.drop('PRECTOTCORR', axis=1) if 'PRECTOTCORR' in df_eng.columns else df_eng
-    print(f"X_latest shape: {X_latest.shape}")
+    Returns:
+        tuple: (cached entry issued from the same observations or None,
+                windows still to forecast or None if the entry already serves the request)
+    """
+    entry = forecast_cache.revalidate(key, ForecastCache.issue_hour(df), temperature)
+    if entry is not None and entry.covers_until >= until:
+        return entry, None
+    return entry, forecast_windows(df, until, entry)
+
+def store_forecast(key, entry, df, temperature, forecast):
+    """Cache a new forecast, or the hours it adds to `entry`."""
+    if entry is not None:
+        return forecast_cache.extend(key, entry, forecast)
+    return forecast_cache.put(key, forecast, temperature, forecast.index[-1].to_pydatetime(),
+                              ForecastCache.issue_hour(df))
+
+async def get_forecast_entry(lat, lon, until, context=None):
+    """
+    Cached forecast for the location covering every hour through `until`.
     
-    # Make predictions
-    results = []
-    print(f"About to enter prediction loop for {min(hours, 24)} hours")
-    print(f"X_latest has {len(X_latest)} rows, model expects sequences of length {model.sequence_length}")
+    On a miss the inputs are fetched. The model only runs for the hours
+    that no forecast issued from the same last observation hour covers.
+    """
+    key = forecast_cache_key(lat, lon)
+    entry = forecast_cache.get(key, until)
+    if entry is None:
+        df, temp = await fetch_forecast_inputs(lat, lon, context)
+        entry, windows = plan_forecast(key, df, temp, until)
+        if windows is not None:
+            forecasts = await inference_scheduler.predict_windows([windows], n_samples=MC_SAMPLES)
+            entry = store_forecast(key, entry, df, temp, forecasts[0])
+    return entry
 
-    # Take only the most recent sequence_length rows
-    if len(X_latest) > model.sequence_length:
-        X_input = X_latest.tail(model.sequence_length)
-    else:
-        X_input = X_latest
-    print(f"Using last {len(X_input)} rows for prediction")
-    # Fetch historical averages
-    print("Fetching 5-year historical averages...")
-    historical_avgs = get_historical_average(lat, lon, target_dt, hours)
-    for i in range(min(hours, 24)):
-        pred_time = target_dt.replace(tzinfo=None) + timedelta(hours=i)
-        
-        # Predict with uncertainty quantification
-        precip_mean, precip_std = model.predict(X_input, n_samples=5)
-        precip_pred = max(0, float(precip_mean))
-        
-        # Calculate confidence: lower std = higher confidence
-        confidence = max(50, min(95, 95 - (precip_std * 9)))
-        
-        # Classify type and intensity
-        temp = current.get('temperature', 10)
-        precip_type = model.classify_precip_type(temp, precip_pred)
-        intensity = model.classify_intensity(precip_pred, precip_type)
-        
-        hist_avg = historical_avgs[i] if i < len(historical_avgs) else 0
-
-        results.append({
-            "timestamp": pred_time.isoformat(),
-            "precipitation_mm": round(float(precip_pred), 2),
-            "precipitation_std": round(float(precip_std), 2),
-            "historical_avg_precip_mm": round(float(hist_avg), 2),
-            "difference_from_avg": round(float(precip_pred - hist_avg), 2),
-            "confidence_percent": round(float(confidence), 0),
-            "type": precip_type,
-            "intensity": intensity,
-            "temperature_c": round(float(temp), 1),
-            "is_historical": False
-        })
+def shared_prediction(lat, lon, target_dt, hours, context=None):
+    """get_prediction, shared by identical concurrent requests (same grid cell, hour and horizon), streamed or not."""
+    hours, _ = forecast_request(target_dt, hours)
+    key = ('forecast', snap_to_grid(lat, lon), target_dt.replace(minute=0, second=0, microsecond=0).isoformat(), hours)
+    return predict_flights.do(key, lambda: get_prediction(lat, lon, target_dt, hours, context))
+
+async def get_prediction(lat, lon, target_dt, hours, context=None):
+    """Make ML prediction for future weather."""
+    hours, until = forecast_request(target_dt, hours)
+    context = context or observation_context(lat, lon, target_dt, hours)
+    entry = await get_forecast_entry(lat, lon, until, context)
+    return await build_prediction(lat, lon, target_dt, hours, entry, context)
+
+async def build_prediction(lat, lon, target_dt, hours, entry, context=None):
+    """
+    Per-hour results for the requested window.
+    
+    Hours before the cached forecast starts have already been observed and
+    are read from POWER; the rest come from the forecast.
+    """
+    context = context or ObservationContext(lat, lon)
+    n_observed = observed_hours(target_dt, hours, entry)
+    # Fetch historical averages (and the observed hours, from the same context)
+    jobs = [get_historical_average(lat, lon, target_dt, hours, context)]
+    if n_observed:
+        jobs.append(observed_window(target_dt, n_observed, context))
+    historical_avgs, *observed = await asyncio.gather(*jobs)
+    with metrics.timer('build_records'):
+        results = prediction_records(target_dt, hours, entry, historical_avgs, observed[0] if observed else None)
     
-    print(f"Returning {len(results)} predictions")
     return {"predictions": results, "location": {"latitude": lat, "longitude": lon}}
 
+def observed_hours(target_dt, hours, entry):
+    """How many of the requested hours come before the forecast starts, i.e. after its last observation."""
+    lead = int((target_dt.replace(tzinfo=None) - entry.forecast.index[0]).total_seconds() // 3600)
+    return min(hours, max(0, -lead))
+
+async def observed_window(target_dt, hours, context):
+    """POWER PRECTOTCORR and T2M for `hours` hours from target_dt, NaN where not published."""
+    times = pd.Timestamp(target_dt.replace(tzinfo=None)) + pd.to_timedelta(np.arange(hours), unit='h')
+    df = await context.frame(times[0], times[-1])
+    if df is None:
+        raise HTTPException(status_code=503, detail="Observations unavailable")
+    df = df.reindex(index=times.floor('h'), columns=['PRECTOTCORR', 'T2M'])
+    return df.where(df != POWER_FILL_VALUE)
+
+def prediction_records(target_dt, hours, entry, historical_avgs, observed=None):
+    """
+    Result dicts for the requested window, next to the historical averages.
+    
+    Args:
+        observed: observed_window for the leading hours before the forecast
+                  starts, or None when the window starts inside the forecast
+    """
+    start_dt = target_dt.replace(tzinfo=None)
+    hist_avg = np.zeros(hours)
+    n_hist = min(len(historical_avgs), hours)
+    hist_avg[:n_hist] = historical_avgs[:n_hist]
+    n_observed = len(observed) if observed is not None else 0
+    results = observed_records(start_dt, observed, hist_avg[:n_observed]) if n_observed else []
+    if n_observed == hours:
+        return results
+    
+    # Slice the rest from the forecast; hours it does not cover are not relabelled
+    start_dt += timedelta(hours=n_observed)
+    hours -= n_observed
+    forecast = entry.forecast
+    lead = int((start_dt - forecast.index[0]).total_seconds() // 3600)
+    if lead < 0 or lead > MAX_LEAD_HOURS or lead + hours > len(forecast):
+        raise HTTPException(
+            status_code=422,
+            detail=f"No forecast for {hours} hours from {start_dt.isoformat()}: the forecast starts at "
+                   f"{forecast.index[0].isoformat()} and reaches at most {MAX_LEAD_HOURS} hours ahead"
+        )
+    forecast = forecast.iloc[lead:lead + hours]
+    hist_avg = hist_avg[n_observed:]
+    temp = entry.temperature
+    
+    precip_mean = forecast['mean'].to_numpy(dtype=float)
+    precip_std = forecast['std'].to_numpy(dtype=float)
+    # Same comparisons as max(0, mean) and max(50, min(95, ...)), so NaN ends up 0 and 95
+    precip_pred = np.where(precip_mean > 0, precip_mean, 0.0)
+    
+    # Calculate confidence: lower std = higher confidence
+    confidence = 95 - (precip_std * 9)
+    confidence = np.where(confidence < 95, confidence, 95.0)
+    confidence = np.where(confidence > 50, confidence, 50.0)
+    
+    # Classify type and intensity
+    precip_types = model.classify_precip_types(temp, precip_pred)
+    
+    pred_times = pd.Timestamp(start_dt) + pd.to_timedelta(np.arange(len(forecast)), unit='h')
+    return results + column_records({
+        "timestamp": isoformat(pred_times),
+        "precipitation_mm": rounded(precip_pred, 2),
+        "precipitation_std": rounded(precip_std, 2),
+        "historical_avg_precip_mm": rounded(hist_avg, 2),
+        "difference_from_avg": rounded(precip_pred - hist_avg, 2),
+        "confidence_percent": rounded(confidence, 0),
+        "type": precip_types,
+        "intensity": model.classify_intensities(precip_pred, precip_types),
+        "temperature_c": round(float(temp), 1),
+        "is_historical": False
+    }, len(forecast))
+
+def observed_records(start_dt, observed, hist_avg):
+    """Result dicts for observed hours, keyed like forecast records; unpublished values are null."""
+    precip = observed['PRECTOTCORR'].to_numpy(dtype=float)
+    temps = observed['T2M'].to_numpy(dtype=float)
+    # Unpublished hours are classified as dry
+    known_precip = np.where(np.isnan(precip), 0.0, precip)
+    precip_types = model.classify_precip_types(temps, known_precip)
+    times = pd.Timestamp(start_dt) + pd.to_timedelta(np.arange(len(observed)), unit='h')
+    return column_records({
+        "timestamp": isoformat(times),
+        "precipitation_mm": rounded_or_none(precip, 2),
+        "precipitation_std": 0.0,
+        "historical_avg_precip_mm": rounded(hist_avg, 2),
+        "difference_from_avg": rounded_or_none(precip - hist_avg, 2),
+        "confidence_percent": 100.0,
+        "type": precip_types,
+        "intensity": model.classify_intensities(known_precip, precip_types),
+        "temperature_c": rounded_or_none(temps, 1),
+        "is_historical": True
+    }, len(observed))
+
+def estimated_windows(items):
+    """
+    Rough count of forecast windows (lat, lon, target_dt, hours) items roll out.
+    
+    Items in one grid cell share a rollout from about the current hour
+    through the latest hour any of them asks for.
+    """
+    now = ForecastCache.current_hour()
+    cells = {}
+    for lat, lon, target_dt, hours in items:
+        _, until = forecast_request(target_dt, hours)
+        cell = snap_to_grid(lat, lon)
+        cells[cell] = max(until, cells.get(cell, until))
+    return sum(
+        max(1, min(int((until - now).total_seconds() // 3600) + 1, MAX_LEAD_HOURS + MAX_FORECAST_HOURS))
+        for until in cells.values()
+    )
+
+async def batch_forecasts(items):
+    """
+    Forecast entries for (lat, lon, target_dt, hours, context) items with one model call.
+    
+    Items in the same grid cell share a forecast. Cache misses fetch their
+    inputs concurrently, and the windows they still need (times MC samples)
+    are evaluated in a single batched forward pass.
+    
+    Returns:
+        One ForecastEntry or Exception per item, in order
+    """
+    entries = [None] * len(items)
+    misses = {}  # cache key -> {"lat", "lon", "context", "until", "positions"}
+    for i, (lat, lon, target_dt, hours, context) in enumerate(items):
+        _, until = forecast_request(target_dt, hours)
+        key = forecast_cache_key(lat, lon)
+        entries[i] = forecast_cache.get(key, until)
+        if entries[i] is None:
+            miss = misses.setdefault(key, {"lat": lat, "lon": lon, "context": context,
+                                           "until": until, "positions": []})
+            miss["until"] = max(until, miss["until"])
+            miss["positions"].append(i)
+    
+    if not misses:
+        return entries
+    
+    keys = list(misses)
+    inputs = await asyncio.gather(
+        *(fetch_forecast_inputs(misses[key]["lat"], misses[key]["lon"], misses[key]["context"]) for key in keys),
+        return_exceptions=True
+    )
+    
+    # Build windows per location; failures only affect their own items
+    pending = []
+    for key, fetched in zip(keys, inputs):
+        try:
+            if isinstance(fetched, Exception):
+                raise fetched
+            df, temperature = fetched
+            entry, windows = plan_forecast(key, df, temperature, misses[key]["until"])
+            if windows is None:
+                for i in misses[key]["positions"]:
+                    entries[i] = entry
+                continue
+            pending.append((key, entry, df, temperature, windows))
+        except Exception as e:
+            for i in misses[key]["positions"]:
+                entries[i] = e
+    
+    if pending:
+        logger.debug("Batched forecast for %d locations", len(pending))
+        forecasts = await inference_scheduler.predict_windows(
+            [windows for _, _, _, _, windows in pending], n_samples=MC_SAMPLES
+        )
+        for (key, entry, df, temperature, _), forecast in zip(pending, forecasts):
+            entry = store_forecast(key, entry, df, temperature, forecast)
+            for i in misses[key]["positions"]:
+                entries[i] = entry
+    return entries
+
+def batch_error(index, error):
+    status_code = error.status_code if isinstance(error, HTTPException) else 500
+    detail = error.detail if isinstance(error, HTTPException) else str(error)
+    return {"index": index, "status_code": status_code, "error": detail}
+
+@app.post("/predict/batch")
+async def predict_weather_batch(req: BatchPredictionRequest):
+    """
+    Predictions for many locations at once.
+    
+    Each item is a /predict request. Results come back in request order,
+    either as the /predict response body or as an error for that item alone.
+    """
+    logger.debug("Received batch request: %d items", len(req.items))
+    if len(req.items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_BATCH_ITEMS} items per batch")
+    
+    results = [None] * len(req.items)
+    historical, forecasts = [], []
+    for i, item in enumerate(req.items):
+        try:
+            target_dt, hours_ahead, days_difference = parse_request_window(item)
+        except Exception as e:
+            results[i] = batch_error(i, e)
+            continue
+        # Same split as /predict: past dates are looked up, the rest forecast
+        if days_difference > 7:
+            historical.append((i, target_dt))
+        else:
+            forecasts.append((i, target_dt, max(1, min(hours_ahead, MAX_FORECAST_HOURS))))
+    
+    windows = estimated_windows([
+        (req.items[i].latitude, req.items[i].longitude, target_dt, hours) for i, target_dt, hours in forecasts
+    ])
+    if windows > MAX_BATCH_WINDOWS:
+        raise HTTPException(status_code=422, detail=f"Batch needs about {windows} forecast windows, "
+                                                   f"at most {MAX_BATCH_WINDOWS} per batch")
+    
+    if forecasts and not model_manager.ready:
+        for i, _, _ in forecasts:
+            results[i] = batch_error(i, HTTPException(status_code=503, detail=f"Model not ready ({model_manager.state})"))
+        forecasts = []
+    
+    # One observation context per item, shared by its forecast inputs and historical average
+    contexts = {
+        i: observation_context(req.items[i].latitude, req.items[i].longitude, target_dt, hours)
+        for i, target_dt, hours in forecasts
+    }
+    entries = await batch_forecasts([
+        (req.items[i].latitude, req.items[i].longitude, target_dt, hours, contexts[i])
+        for i, target_dt, hours in forecasts
+    ])
+    
+    jobs = [
+        (i, get_historical(req.items[i].latitude, req.items[i].longitude, target_dt))
+        for i, target_dt in historical
+    ]
+    for (i, target_dt, hours), entry in zip(forecasts, entries):
+        if isinstance(entry, Exception):
+            results[i] = batch_error(i, entry)
+        else:
+            jobs.append((i, build_prediction(req.items[i].latitude, req.items[i].longitude, target_dt, hours,
+                                             entry, contexts[i])))
+    
+    outcomes = await asyncio.gather(*(job for _, job in jobs), return_exceptions=True)
+    for (i, _), outcome in zip(jobs, outcomes):
+        if isinstance(outcome, Exception):
+            results[i] = batch_error(i, outcome)
+        else:
+            item = req.items[i]
+            results[i] = {"index": i, "status_code": 200,
+                          **outcome, "location": {"latitude": item.latitude, "longitude": item.longitude}}
+    
+    return respond({"results": results})
+
+async def fetch_historical_baseline(lat, lon, start_date, end_date):
+    """5-year hourly baseline from the local MERRA-2/POWER climatology, else live from Data Rods."""
+    with metrics.timer('historical_average'):
+        return await _fetch_historical_baseline(lat, lon, start_date, end_date)
+
+async def _fetch_historical_baseline(lat, lon, start_date, end_date):
+    try:
+        # A changed source directory rebuilds the climatology index (CSV parse and npz write), so keep it off the loop
+        return await asyncio.to_thread(
+            fetch_giovanni_historical_average,
+            lat,
+            lon,
+            start_date,
+            end_date,
+            years_back=5
+        )
+    except LookupError as e:
+        # No local source near this coordinate, fetch it live
+        logger.info("%s, falling back to Data Rods", e)
+        return await fetch_datarods_historical_average(
+            lat,
+            lon,
+            start_date,
+            end_date,
+            years_back=5
+        )
+
+async def stream_historical_baseline(lat, lon, start_date, end_date):
+    """Records for a streamed /historical-baseline: one "baseline" record per hour, then a "summary"."""
+    started = time.perf_counter()
+    historical_data = await fetch_historical_baseline(lat, lon, start_date, end_date)
+    records = frame_records(historical_data)
+    for record in records:
+        yield {"event": "baseline", **record}
+    yield {
+        "event": "summary",
+        "records": len(records),
+        "location": {"latitude": lat, "longitude": lon},
+        "date_range": {"start": start_date, "end": end_date},
+        "elapsed_seconds": round(time.perf_counter() - started, 3)
+    }
+
 @app.post("/historical-baseline")
-async def get_historical_baseline(req: PredictionRequest):
+async def get_historical_baseline(req: PredictionRequest, stream: Optional[str] = None):
     """
     Get historical average precipitation for comparison with predictions.
+    
+    ?stream=ndjson or ?stream=sse streams the hourly records instead.
     """
     try:
         # Convert timestamps
@@ -251,25 +805,25 @@ async def get_historical_baseline(req: PredictionRequest):
         start_date = target_dt.strftime('%Y-%m-%d')
         end_date = end_dt.strftime('%Y-%m-%d')
         
-        print(f"Fetching historical baseline for {start_date} to {end_date}")
+        logger.debug("Fetching historical baseline for %s to %s", start_date, end_date)
         
-        # Fetch 5-year historical average using MERRA-2
-        historical_data = fetch_giovanni_historical_average(
-            req.latitude,
-            req.longitude,
-            start_date,
-            end_date,
-            years_back=5
-        )
+        if stream:
+            check_stream_format(stream)
+            records = stream_historical_baseline(req.latitude, req.longitude, start_date, end_date)
+            return stream_records(records, stream)
         
-        return {
+        historical_data = await fetch_historical_baseline(req.latitude, req.longitude, start_date, end_date)
+        
+        return respond({
             "location": {"latitude": req.latitude, "longitude": req.longitude},
             "date_range": {"start": start_date, "end": end_date},
-            "historical_baseline": historical_data.to_dict('records')
-        }
+            "historical_baseline": frame_records(historical_data)
+        })
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"ERROR in historical_baseline: {e}")
+        logger.exception("Error in historical_baseline")
         raise HTTPException(status_code=500, detail=str(e))
 
 